@@ -50,19 +50,18 @@ class CtrlTest:
         retries = 5
         while(1):
             self.__ser.write(cmd)
-            self.__ser.flush()
             retries -= 1
-            sleep(0.1)
+            # __read_resp blocks until the response arrives
             resp = self.__read_resp(timeout)
             if resp[1][0] == False:
-                sleep(0.2)
-                print("Command failed, retrying...")
                 if retries <= 0:
                     print("Command failed after 5 retries")
                     return None
+                print("Command failed, retrying...")
+                # Back off before the retry
+                sleep(1.2)
             else:
                 break
-            sleep(1)
         return resp
     
     # ===============================================================
@@ -71,7 +70,7 @@ class CtrlTest:
         # Wait for a response.
         # Send all STATUS responses
         # Return RESPONSE responses
-        acc = ""
+        acc = bytearray()
         val = 0
         success = False
         name = ""
@@ -81,8 +80,8 @@ class CtrlTest:
         resp_timeout = timeout*2
         while(1):
             # Read a single character
-            chr = self.__ser.read().decode('utf-8')
-            if chr == '':
+            c = self.__ser.read()
+            if len(c) == 0:
                 # Timeout on read
                 if resp_timeout <= 0:
                     # Timeout on waiting for a response
@@ -93,34 +92,33 @@ class CtrlTest:
                     resp_timeout -= 1
                     sleep(0.5)
                     continue
-            acc = acc + chr
-            if chr == ";":
+            acc.append(c[0])
+            if c[0] == 0x3B:
                 # Found terminator character
-                if "Status" in acc:
+                frame = acc.decode('utf-8', 'replace')
+                acc.clear()
+                if "Status" in frame:
                     # Its a status message so return this directly
-                    print("Status Pos: ", self.__encode(acc)[1][1][0])
-                    acc = ""
+                    print("Status Pos: ", self.__encode(frame)[1][1][0])
                     continue
-                if "Limit" in acc:
-                    print("Limit: ", self.__encode(acc)[1][1][0])
+                if "Limit" in frame:
+                    print("Limit: ", self.__encode(frame)[1][1][0])
                     continue
-                elif "Dbg" in acc:
+                elif "Dbg" in frame:
                     # Its a debug message so return this directly
-                    print("Debug: ", self.__encode(acc)[1][1][0])
-                    acc = ""
+                    print("Debug: ", self.__encode(frame)[1][1][0])
                     continue
                 # Otherwise its a response to the command
-                print("Response: {}".format(self.__encode(acc)))
+                print("Response: {}".format(self.__encode(frame)))
                 if self.__ser.in_waiting > 0:
                     # Still data in buffer, probably should not happen!
                     # Dump response and use this data
                     print("More data available {} - collecting... ".format(self.__ser.in_waiting))
-                    acc = ""
                     continue
                 success = True
                 break
         if success:
-            return(self.__encode(acc))
+            return(self.__encode(frame))
         else:
             return (name, (success, val))
 
@@ -222,7 +222,10 @@ class API:
     # Abort is complex of which informing the serial module to abort the
     # current activity is part.
     def abort_activity(self):
-        self.__s_q.put(('abort', []))
+        if self.__serial_running:
+            self.__serial_comms.abort_now()
+        else:
+            self.__s_q.put(('abort', []))
     
     # VNA
     def get_resonance(self, start, end, points=101):
@@ -76,7 +76,7 @@ class AppMain:
         self.__model = persist.getSavedCfg(self.path)
         if self.__model == None:
             logger.info ('Configuration not found, using defaults')
-            self.__model = model.flexi_loop_model
+            self.__model = model.default_model()
             self.__configured = False
         
         # The one and only QApplication 
@@ -30,8 +30,6 @@ import queue
 import threading
 import traceback
 import logging
-import copy
-from time import sleep
 
 # Application imports
 from defs import *
@@ -34,9 +34,30 @@ from qt_inc import *
 # Application imports
 from defs import *
 from utils import *
-import api
+import style
+import tablemodel
 
-# Setpoint config dialog        
+# Read only table model over the calibration points for a loop
+# Rows are shown in reverse order of the calibration run
+class CalTableModel(tablemodel.PointTableModel):
+    
+    def __init__(self, model):
+        super(CalTableModel, self).__init__(('Position %', 'Freq', 'SWR'))
+        
+        self.__model = model
+    
+    #=======================================================
+    # PUBLIC
+    #
+    # Replace the points being viewed
+    # The display rows are built once here rather than on every paint
+    # Returns True if the view was reset
+    def set_points(self, points):
+        to_percent = analog_to_percent_fn(self.__model)
+        return self._reset_rows([(pos, (str(to_percent(pos)), str(freq), str(swr)))
+                                 for pos, freq, swr in reversed(points)])
+    
+# Calibration view dialog        
 class Calview(QDialog):
     
     def __init__(self, model, callback, msgs):
@@ -51,22 +72,19 @@ class Calview(QDialog):
         self.__cb = callback
         self.__msgs = msgs
         
+        # Model sections used by this dialog
+        # Sections are updated in place and never replaced so these stay live
+        self.__cal = model[CONFIG][CAL]
+        self.__ard_state = model[STATE][ARDUINO]
+        self.__geom = model[STATE][WINDOWS][CALVIEW_WIN]
+        
         # Instance vars
         self.__loop = -1
-        self.__pos_lookup = {}
+        self.__loop_key = CAL_L1
+        self.__moveto_enabled = None
      
         # Set the back colour
-        palette = QPalette()
-        palette.setColor(QPalette.Background, QColor(149,142,132))
-        self.setPalette(palette)
-
-        # Set the tooltip style
-        QToolTip.setFont(QFont('SansSerif', 10))
-        self.setStyleSheet('''QToolTip { 
-                           background-color: darkgray; 
-                           color: black; 
-                           border: #8ad4ff solid 1px
-                           }''')
+        self.setPalette(style.dialog_palette())
         
         # Initialise the GUI
         self.__initUI()
@@ -74,17 +92,24 @@ class Calview(QDialog):
         # Populate
         self.__populate()
         
-        # Start idle processing
-        QtCore.QTimer.singleShot(IDLE_LONG_TICKER, self.__idleProcessing)
+        # Selection changes update the buttons directly
+        # Online state has no signal so is checked periodically but only while visible
+        self.__table.selectionModel().currentChanged.connect(self.__refresh_button_state)
+        self.__idle_timer = QtCore.QTimer(self)
+        self.__idle_timer.setInterval(IDLE_LONG_TICKER)
+        self.__idle_timer.timeout.connect(self.__refresh_button_state)
         
     #=======================================================
     # PRIVATE
     #
     # Basic initialisation
     def __initUI(self):
+        
         # Arrange window
-        x,y,w,h = self.__model[STATE][WINDOWS][CALVIEW_WIN]
+        x,y,w,h = self.__geom
         self.setGeometry(x,y,w,h)
+        # Window moves and resizes are written to the model when they stop
+        self.__geom_saver = style.GeometrySaver(self, self.__geom)
                          
         self.setWindowTitle('Flexi-Loop Calibration View')
         
@@ -104,10 +129,10 @@ class Calview(QDialog):
         grid.addWidget(heading,0, 0, 1, 3)
         
         # Table area
-        self.__table = QTableWidget()
+        self.__cal_model = CalTableModel(self.__model)
+        self.__table = QTableView()
+        self.__table.setModel(self.__cal_model)
         self.__table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.__table.setColumnCount(3)
-        self.__table.setHorizontalHeaderLabels(('Position %', 'Freq', 'SWR',))
         grid.addWidget(self.__table, 1, 0, 1, 3)
         
         # Button area
@@ -129,23 +154,22 @@ class Calview(QDialog):
     # Called to set current loop before showing dialog
     def set_loop(self, loop):
         self.__loop = loop
+        self.__loop_key = self.__get_loop_item()
         self.__looplabel.setText('Calibration points for loop [%d]' % self.__loop)
         self.__populate_table()
     
     #=======================================================
     # Window events
+    def showEvent(self, event):
+        self.__refresh_button_state()
+        self.__idle_timer.start()
+        
+    def hideEvent(self, event):
+        self.__idle_timer.stop()
+        
     def closeEvent(self, event):
+        self.__geom_saver.flush()
         self.close()
-
-    def resizeEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][CALVIEW_WIN]
-        self.__model[STATE][WINDOWS][CALVIEW_WIN] = [x,y,event.size().width(),event.size().height()]
-    
-    def moveEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][CALVIEW_WIN]
-        self.__model[STATE][WINDOWS][CALVIEW_WIN] = [event.pos().x(),event.pos().y(),w,h]
     
     #=======================================================
     # User events
@@ -155,64 +179,38 @@ class Calview(QDialog):
     
     # Move to calibration point
     def __do_move(self):
-        row = self.__table.currentRow()
-        pos = float(self.__table.item(row, 1).text())
-        if pos in self.__pos_lookup:
-            abs_pos = self.__pos_lookup[pos]
+        row = self.__table.currentIndex().row()
+        if row != -1:
             # Ask UI to move to pos
-            self.__cb(abs_pos)
-        else:
-            self.logger.warn("Failed to lookup [{}] in lookup table [{}]".format(pos, self.__pos_lookup))
+            self.__cb(self.__cal_model.abs_pos(row))
             
     #=======================================================
     # Helpers
     # Populate the table from model data for current loop
     def __populate_table(self):
-        # Clear table
-        row = 0
-        while self.__table.rowCount() > 0:
-            self.__table.removeRow(0);
-        # Populate
-        key = self.__get_loop_item()
-        points = self.__model[CONFIG][CAL][key]
-        for point in reversed(points):
-            self.__table.insertRow(row)
-            self.__table.setItem(row, 0, QTableWidgetItem(str(analog_pos_to_percent(self.__model, point[0]))))
-            self.__table.setItem(row, 1, QTableWidgetItem(str(point[1])))
-            self.__table.setItem(row, 2, QTableWidgetItem(str(point[2])))
-            # Add to dict
-            self.__pos_lookup[analog_pos_to_percent(self.__model, point[0])] = point[0] 
-            row += 1
-        if self.__table.rowCount() > 0:
-            self.__table.selectRow(0)
+        # The view is only reset when the rows differ from those shown
+        if self.__cal_model.set_points(self.__cal[self.__loop_key]):
+            if self.__cal_model.rowCount() > 0:
+                self.__table.selectRow(0)
+            self.__refresh_button_state()
         
     # Get key for loop    
     def __get_loop_item(self):
-        if self.__loop == 1:
-           item = CAL_L1
-        elif self.__loop == 2:
-           item = CAL_L2
-        elif self.__loop == 3:
-           item = CAL_L3
-        else:
-            # Should not happen
-            self.logger.warn("Invalid loop id {}".format(self.__loop))
-            item = CAL_L1
-        return item
+        if 1 <= self.__loop <= 3:
+            return (CAL_L1, CAL_L2, CAL_L3)[self.__loop-1]
+        # Should not happen
+        self.logger.warn("Invalid loop id {}".format(self.__loop))
+        return CAL_L1
 
     
     # =======================================================
-    # Background activities
-    def __idleProcessing(self):
+    # Button state
+    def __refresh_button_state(self):
          
-        # Adjust buttons       
-        r = self.__table.currentRow()
-        if r == -1 or not self.__model[STATE][ARDUINO][ONLINE]:
-            # No row selected
-            self.__moveto.setEnabled(False)
-        else:
-            self.__moveto.setEnabled(True) 
-        
-        # Reset timer    
-        QtCore.QTimer.singleShot(IDLE_LONG_TICKER, self.__idleProcessing)
+        # Adjust buttons only when the state changes
+        # No row selected or not online disables move
+        enable = self.__table.currentIndex().row() != -1 and self.__ard_state[ONLINE]
+        if enable != self.__moveto_enabled:
+            self.__moveto.setEnabled(enable)
+            self.__moveto_enabled = enable
         
\ No newline at end of file
@@ -27,7 +27,6 @@
 import sys
 import traceback
 import logging
-import copy
 
 # PyQt5 imports
 from qt_inc import *
@@ -35,12 +34,28 @@ from qt_inc import *
 # Application imports
 from defs import *
 from utils import *
-import api
 import persist
+import style
 
 # Main config dialog        
 class Config(QDialog):
     
+    # Spin box specs as (model key, label, tooltip, minimum, maximum)
+    __SPEED_SPECS = (
+        (MINIMUM, 'Minimum Speed', 'Minimum motor speed', 40, 100),
+        (MAXIMUM, 'Maximum Speed', 'Maximum motor speed', 300, 500),
+        (DEFAULT, 'Default Speed', 'Default motor speed', 100, 300))
+    __STEP_SPECS = (
+        (STEPS_1, 'Points loop-1', 'Loop 1 number of calibration points', 5, 50),
+        (STEPS_2, 'Points loop-2', 'Loop 2 number of calibration points', 5, 50),
+        (STEPS_3, 'Points loop-3', 'Loop 3 number of calibration points', 5, 50))
+    __TIMEOUT_SPECS = (
+        (CALIBRATE_TIMEOUT, 'Calibration Timeout', 'Set number of seconds to wait for calibration to finish', 0, 200),
+        (TUNE_TIMEOUT, 'Tune Timeout', 'Set number of seconds to wait for tuning to finish', 0, 200),
+        (RES_TIMEOUT, 'Resonance Timeout', 'Set number of seconds to wait for finding current resonance frequency', 0, 100),
+        (MOVE_TIMEOUT, 'Move Timeout', 'Set number of seconds to wait to move to extension %age', 0, 60),
+        (SHORT_TIMEOUT, 'Short Timeout', 'Set number of seconds to wait for short running actions', 0, 10))
+    
     def __init__(self, model, msgs):
         super(Config, self).__init__()
 
@@ -51,21 +66,18 @@ class Config(QDialog):
         self.__model = model
         self.__msgs = msgs
         
-        # Instance vars
-        self.__selected_loop = 1
+        # Model sections used by this dialog
+        # Sections are updated in place and never replaced so these stay live
+        cfg = model[CONFIG]
+        self.__arduino = cfg[ARDUINO]
+        self.__speeds = cfg[ARDUINO][MOTOR_SPEED]
+        self.__steps = cfg[CAL][STEPS]
+        self.__timeouts = cfg[TIMEOUTS]
+        self.__vna = cfg[VNA]
+        self.__geom = model[STATE][WINDOWS][CONFIG_WIN]
         
         # Set the back colour
-        palette = QPalette()
-        palette.setColor(QPalette.Background, QColor(149,142,132))
-        self.setPalette(palette)
-
-        # Set the tooltip style
-        QToolTip.setFont(QFont('SansSerif', 10))
-        self.setStyleSheet('''QToolTip { 
-                           background-color: darkgray; 
-                           color: black; 
-                           border: #8ad4ff solid 1px
-                           }''')
+        self.setPalette(style.dialog_palette())
         
         # Initialise the GUI
         self.__initUI()
@@ -73,6 +85,21 @@ class Config(QDialog):
         # Populate
         self.__populate_ui()
         
+        # Set values from the model
+        self.reload()
+        
+    #=======================================================
+    # PUBLIC
+    #
+    # Reload all widget values from the model
+    # Called each time the dialog is reopened so any edits that were not saved are discarded
+    # Signals are blocked so setting values does not trigger any connected slots
+    def reload(self):
+        # Tabs not yet shown have no widgets to load
+        for index, built in self.__tab_built.items():
+            if built:
+                self.__tabs[index][2]()
+        
     #=======================================================
     # PRIVATE
     #
@@ -80,8 +107,10 @@ class Config(QDialog):
     def __initUI(self):
         
         # Arrange window
-        x,y,w,h = self.__model[STATE][WINDOWS][CONFIG_WIN]
+        x,y,w,h = self.__geom
         self.setGeometry(x,y,w,h)
+        # Window moves and resizes are written to the model when they stop
+        self.__geom_saver = style.GeometrySaver(self, self.__geom)
                          
         self.setWindowTitle('Flexi-Loop Configuration')
         
@@ -101,144 +130,104 @@ class Config(QDialog):
         container.setLayout(common)
         layout.addWidget(container, 1, 0)
         
-        # Arduino tab
-        arduinotab = QWidget()
-        self.top_tab_widget.addTab(arduinotab, "Arduino")
-        arduinogrid = QGridLayout()
-        arduinotab.setLayout(arduinogrid)
-        self.__populate_arduino(arduinogrid)
-        
-        # Caibration tab
-        calibrationab = QWidget()
-        self.top_tab_widget.addTab(calibrationab, "Calibration")
-        calobrationgrid = QGridLayout()
-        calibrationab.setLayout(calobrationgrid)
-        self.__populate_calibration(calobrationgrid)
-
-        # Timeouts tab
-        timeouttab = QWidget()
-        self.top_tab_widget.addTab(timeouttab, "Timeouts")
-        timeoutgrid = QGridLayout()
-        timeouttab.setLayout(timeoutgrid)
-        self.__populate_timeouts(timeoutgrid)
-        
-        # VNA tab
-        vnatab = QWidget()
-        self.top_tab_widget.addTab(vnatab, "VNA")
-        vnagrid = QGridLayout()
-        vnatab.setLayout(vnagrid)
-        self.__populate_vna(vnagrid)
+        # Tabs
+        # Widgets are not created until the tab is first shown
+        # Index : (form, populate, load, save)
+        self.__tabs = {}
+        for name, populate, load, save in (
+                ("Arduino", self.__populate_arduino, self.__load_arduino, self.__save_arduino),
+                ("Calibration", self.__populate_calibration, self.__load_calibration, self.__save_calibration),
+                ("Timeouts", self.__populate_timeouts, self.__load_timeouts, self.__save_timeouts),
+                ("VNA", self.__populate_vna, self.__load_vna, self.__save_vna)):
+            tab = QWidget()
+            index = self.top_tab_widget.addTab(tab, name)
+            form = self.__new_form()
+            tab.setLayout(form)
+            self.__tabs[index] = (form, populate, load, save)
+        self.__tab_built = dict.fromkeys(self.__tabs, False)
+        
+        self.top_tab_widget.currentChanged.connect(self.__on_tab, QtCore.Qt.DirectConnection)
+        # Build the tab shown on opening
+        self.__on_tab(self.top_tab_widget.currentIndex())
         
         # Action buttons
         self.__save = QPushButton("Save")
         self.__save.setMaximumWidth(30)
         self.__save.setToolTip('Save changes ...')
         common.addWidget(self.__save, 0, 0)
-        self.__save.clicked.connect(self.__do_save)
+        self.__save.clicked.connect(self.__do_save, QtCore.Qt.DirectConnection)
         self.__cancel = QPushButton("Cancel")
         self.__cancel.setMaximumWidth(30)
         self.__cancel.setToolTip('Cancel changes ...')
         common.addWidget(self.__cancel, 0, 1)
-        self.__cancel.clicked.connect(self.__do_cancel)
+        self.__cancel.clicked.connect(self.__do_cancel, QtCore.Qt.DirectConnection)
         self.__close = QPushButton("Close")
         self.__close.setMaximumWidth(30)
         self.__close.setToolTip('Close configuration')
         common.addWidget(self.__close, 0, 3)
-        self.__close.clicked.connect(self.__do_close)
+        self.__close.clicked.connect(self.__do_close, QtCore.Qt.DirectConnection)
         
         # Adjust layout
-        gap = QWidget()
-        common.addWidget(gap, 0, 2)
         common.setColumnStretch(2, 1)
         
+    #=======================================================
+    # Form layout for a tab
+    # Labels are given as strings so the form creates them
+    def __new_form(self):
+        form = QFormLayout()
+        form.setFieldGrowthPolicy(QFormLayout.FieldsStayAtSizeHint)
+        form.setLabelAlignment(QtCore.Qt.AlignLeft)
+        form.setFormAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        return form
+    
+    # Add a labelled spin box row to a form
+    # Sizes come from the #dialog rules in the stylesheet
+    def __add_spin(self, form, label, tip, low, high):
+        sb = QSpinBox()
+        sb.setObjectName("dialog")
+        sb.setToolTip(tip)
+        sb.setRange(low, high)
+        form.addRow(label, sb)
+        return sb
+    
+    # Add a spin box row for each spec, returns the spin boxes keyed by model key
+    def __add_spins(self, form, specs):
+        return {key: self.__add_spin(form, label, tip, low, high) for key, label, tip, low, high in specs}
+    
     #=======================================================
     # Populate tabs
-    def __populate_arduino(self, grid):
+    def __populate_arduino(self, form):
         # Serial port
-        portlabel = QLabel('Arduino Port')
-        grid.addWidget(portlabel, 0, 0)
         self.__serialporttxt = QLineEdit()
         self.__serialporttxt.setObjectName("dialog")
-        self.__serialporttxt.setText(self.__model[CONFIG][ARDUINO][PORT])
         self.__serialporttxt.setToolTip('Set Arduino Port')
-        self.__serialporttxt.setMaximumWidth(80)
-        grid.addWidget(self.__serialporttxt, 0, 1)
-        grid.setAlignment(QtCore.Qt.AlignLeft)
+        form.addRow('Arduino Port', self.__serialporttxt)
         
-        minlabel = QLabel('Minimum Speed')
-        grid.addWidget(minlabel, 1, 0)
-        self.__mintxt = QSpinBox()
-        self.__mintxt.setObjectName("dialog")
-        self.__mintxt.setToolTip('Minimum motor speed')
-        self.__mintxt.setRange(40,100)
-        self.__mintxt.setValue(self.__model[CONFIG][ARDUINO][MOTOR_SPEED][MINIMUM])
-        self.__mintxt.setMinimumWidth(80)
-        grid.addWidget(self.__mintxt, 1, 1)
-        
-        maxlabel = QLabel('Maximum Speed')
-        grid.addWidget(maxlabel, 2, 0)
-        self.__maxtxt = QSpinBox()
-        self.__maxtxt.setObjectName("dialog")
-        self.__maxtxt.setToolTip('Maximum motor speed')
-        self.__maxtxt.setRange(300,500)
-        self.__maxtxt.setValue(self.__model[CONFIG][ARDUINO][MOTOR_SPEED][MAXIMUM])
-        self.__maxtxt.setMinimumWidth(80)
-        grid.addWidget(self.__maxtxt, 2, 1)
-        
-        deflabel = QLabel('Default Speed')
-        grid.addWidget(deflabel, 3, 0)
-        self.__deftxt = QSpinBox()
-        self.__deftxt.setObjectName("dialog")
-        self.__deftxt.setToolTip('Default motor speed')
-        self.__deftxt.setRange(100,300)
-        self.__deftxt.setValue(self.__model[CONFIG][ARDUINO][MOTOR_SPEED][DEFAULT])
-        self.__deftxt.setMinimumWidth(80)
-        grid.addWidget(self.__deftxt, 3, 1)
-        
-        # Close gaps
-        grid.setRowStretch(4, 1)
-        grid.setColumnStretch(4, 1)
+        # Motor speeds
+        self.__speed_widgets = self.__add_spins(form, Config.__SPEED_SPECS)
+    
+    def __load_arduino(self):
+        self.__set_quiet(self.__serialporttxt, self.__serialporttxt.setText, self.__arduino[PORT])
+        self.__load_spins(self.__speed_widgets, self.__speeds)
+    
+    def __save_arduino(self):
+        port = self.__update_section(self.__arduino, {PORT: self.__serialporttxt.text()})
+        speeds = self.__update_section(self.__speeds, self.__values(self.__speed_widgets))
+        return port or speeds
 
-    def __populate_calibration(self, grid):
+    def __populate_calibration(self, form):
         # Calibration data for each band covered by
-        callabel = QLabel('Number of calibration points: ')
-        grid.addWidget(callabel, 0, 0, 1,4)
-        
-        step1label = QLabel('Points loop-1')
-        grid.addWidget(step1label, 1, 0)
-        self.__step1txt = QSpinBox()
-        self.__step1txt.setObjectName("dialog")
-        self.__step1txt.setToolTip('Loop 1 number of calibration points')
-        self.__step1txt.setRange(5,50)
-        self.__step1txt.setMinimumWidth(80)
-        self.__step1txt.setValue(self.__model[CONFIG][CAL][STEPS][STEPS_1])
-        grid.addWidget(self.__step1txt, 1, 1)
-        
-        step2label = QLabel('Points loop-2')
-        grid.addWidget(step2label, 2, 0)
-        self.__step2txt = QSpinBox()
-        self.__step2txt.setObjectName("dialog")
-        self.__step2txt.setToolTip('Loop 2 number of calibration points')
-        self.__step2txt.setRange(5,50)
-        self.__step2txt.setMinimumWidth(80)
-        self.__step2txt.setValue(self.__model[CONFIG][CAL][STEPS][STEPS_2])
-        grid.addWidget(self.__step2txt, 2, 1)
+        form.addRow(QLabel('Number of calibration points: '))
         
-        step3label = QLabel('Points loop-3')
-        grid.addWidget(step3label, 3, 0)
-        self.__step3txt = QSpinBox()
-        self.__step3txt.setObjectName("dialog")
-        self.__step3txt.setToolTip('Loop 3 number of calibration points')
-        self.__step3txt.setRange(5,50)
-        self.__step3txt.setMinimumWidth(80)
-        self.__step3txt.setValue(self.__model[CONFIG][CAL][STEPS][STEPS_3])
-        grid.addWidget(self.__step3txt, 3, 1)
-        
-         # Close gaps
-        grid.setRowStretch(4, 1)
-        grid.setColumnStretch(2, 1)
+        self.__step_widgets = self.__add_spins(form, Config.__STEP_SPECS)
+    
+    def __load_calibration(self):
+        self.__load_spins(self.__step_widgets, self.__steps)
+    
+    def __save_calibration(self):
+        return self.__update_section(self.__steps, self.__values(self.__step_widgets))
         
-    def __populate_timeouts(self, grid):
+    def __populate_timeouts(self, form):
         # Defaults for timeouts
         # Note values are configured in seconds
         # Working values depend on idle tick time
@@ -248,145 +237,63 @@ class Config(QDialog):
         # MOVE_TIMEOUT = 30 * (1000/IDLE_TICKER)
         # SHORT_TIMEOUT = 2 * (1000/IDLE_TICKER)
         
-        toinfolabel = QLabel('Timeouts for activities in seconds (waiting for Arduino response)')
-        grid.addWidget(toinfolabel, 0, 0, 1, 3)
+        form.addRow(QLabel('Timeouts for activities in seconds (waiting for Arduino response)'))
         
-        caltolabel = QLabel('Calibration Timeout')
-        grid.addWidget(caltolabel, 1, 0)
-        self.__caltotxt = QSpinBox()
-        self.__caltotxt.setObjectName("dialog")
-        self.__caltotxt.setToolTip('Set number of seconds to wait for calibration to finish')
-        self.__caltotxt.setRange(0,200)
-        self.__caltotxt.setValue(self.__model[CONFIG][TIMEOUTS][CALIBRATE_TIMEOUT])
-        self.__caltotxt.setMinimumWidth(80)
-        grid.addWidget(self.__caltotxt, 1, 1)
+        self.__timeout_widgets = self.__add_spins(form, Config.__TIMEOUT_SPECS)
+     
+    def __load_timeouts(self):
+        self.__load_spins(self.__timeout_widgets, self.__timeouts)
     
-        tunetolabel = QLabel('Tune Timeout')
-        grid.addWidget(tunetolabel, 2, 0)
-        self.__tunetotxt = QSpinBox()
-        self.__tunetotxt.setObjectName("dialog")
-        self.__tunetotxt.setToolTip('Set number of seconds to wait for tuning to finish')
-        self.__tunetotxt.setRange(0,200)
-        self.__tunetotxt.setValue(self.__model[CONFIG][TIMEOUTS][TUNE_TIMEOUT])
-        self.__tunetotxt.setMinimumWidth(80)
-        grid.addWidget(self.__tunetotxt, 2, 1)
-        
-        restolabel = QLabel('Resonance Timeout')
-        grid.addWidget(restolabel, 3, 0)
-        self.__restotxt = QSpinBox()
-        self.__restotxt.setObjectName("dialog")
-        self.__restotxt.setToolTip('Set number of seconds to wait for finding current resonance frequency')
-        self.__restotxt.setRange(0,100)
-        self.__restotxt.setValue(self.__model[CONFIG][TIMEOUTS][RES_TIMEOUT])
-        self.__restotxt.setMinimumWidth(80)
-        grid.addWidget(self.__restotxt, 3, 1)
-        
-        movetolabel = QLabel('Move Timeout')
-        grid.addWidget(movetolabel, 4, 0)
-        self.__movetotxt = QSpinBox()
-        self.__movetotxt.setObjectName("dialog")
-        self.__movetotxt.setToolTip('Set number of seconds to wait to move to extension %age')
-        self.__movetotxt.setRange(0,60)
-        self.__movetotxt.setValue(self.__model[CONFIG][TIMEOUTS][MOVE_TIMEOUT])
-        self.__movetotxt.setMinimumWidth(80)
-        grid.addWidget(self.__movetotxt, 4, 1)
-        
-        shorttolabel = QLabel('Short Timeout')
-        grid.addWidget(shorttolabel, 5, 0)
-        self.__shorttotxt = QSpinBox()
-        self.__shorttotxt.setObjectName("dialog")
-        self.__shorttotxt.setToolTip('Set number of seconds to wait for short running actions')
-        self.__shorttotxt.setRange(0,10)
-        self.__shorttotxt.setValue(self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT])
-        self.__shorttotxt.setMinimumWidth(80)
-        grid.addWidget(self.__shorttotxt, 5, 1)
-        
-        # Close gaps
-        grid.setRowStretch(6, 1)
-        grid.setColumnStretch(2, 1)
+    def __save_timeouts(self):
+        return self.__update_section(self.__timeouts, self.__values(self.__timeout_widgets))
      
     #=======================================================
     # Populate VNA
-    def __populate_vna(self, grid):
+    def __populate_vna(self, form):
         # VNA enable
-        vnalabel = QLabel('VNA Enable')
-        grid.addWidget(vnalabel, 0, 0)
         self.__vnacb = QCheckBox('')
-        grid.addWidget(self.__vnacb, 0, 1)
-        self.__vnacb.stateChanged.connect(self.__vna_state_changed)
-        
-        if self.__model[CONFIG][VNA][VNA_ENABLED]:
-            self.__vnacb.setChecked(True)
-        else:
-            self.__vnacb.setChecked(False)
-            
-        # Close gaps
-        grid.setRowStretch(1, 1)
-        grid.setColumnStretch(2, 1)
+        form.addRow('VNA Enable', self.__vnacb)
+    
+    def __load_vna(self):
+        self.__set_quiet(self.__vnacb, self.__vnacb.setChecked, self.__vna[VNA_ENABLED])
+    
+    def __save_vna(self):
+        return self.__update_section(self.__vna, {VNA_ENABLED: self.__vnacb.isChecked()})
         
+    #=======================================================
+    # Set a widget value with its signals blocked
+    def __set_quiet(self, widget, setter, value):
+        with QtCore.QSignalBlocker(widget):
+            setter(value)
+    
     #=======================================================
     # Window events
     def closeEvent(self, event):
-        self.close()
-
-    def resizeEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][CONFIG_WIN]
-        self.__model[STATE][WINDOWS][CONFIG_WIN] = [x,y,event.size().width(),event.size().height()]
-        
-    def moveEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][CONFIG_WIN]
-        self.__model[STATE][WINDOWS][CONFIG_WIN] = [event.pos().x(),event.pos().y(),w,h]
+        # Keep the dialog for next time, just hide it
+        self.__geom_saver.flush()
+        event.ignore()
+        self.hide()
         
     #=======================================================
     # User events
 
+    #===========================
+    # Tab events
+    # Build a tab the first time it is shown
+    def __on_tab(self, index):
+        if not self.__tab_built.get(index, True):
+            form, populate, load, save = self.__tabs[index]
+            populate(form)
+            load()
+            self.__tab_built[index] = True
+            
     #===========================
     # Arduino tab events
     # None
     
     #===========================
     # Calibration tab events
-    # Target loop changed
-    def __loop_change(self, index):
-        # Set loop selection needed by the callback as it cant access widgets
-        # Index is zero based, loops are 1 based
-        self.__selected_loop = index + 1
-        self.__populate_table()
-        
-    # New table row selected
-    def __row_changed(self):
-        if self.__table.currentRow() == -1:
-            self.__remove.setEnabled(False)
-        else:
-            self.__remove.setEnabled(True)
-            
-    # Button events
-    def __do_new(self):
-        # Just clear the fields
-        self.__nametxt.setText('')
-        self.__lowfreqtxt.setText('')
-        self.__highfreqtxt.setText('')
-        self.__steptxt.setValue(10)
-        self.__poslowtxt.setText('')
-        self.__poshitxt.setText('')
-    
-    # Add current set to local sets
-    def __do_add(self):
-        key = self.__get_loop_item()
-        self.__sets[key][self.__nametxt.text()] = [float(self.__lowfreqtxt.text()), float(self.__poslowtxt.text()), float(self.__highfreqtxt.text()), float(self.__poshitxt.text()), int(self.__steptxt.value())]
-        self.__populate_table()
-    
-    # Remove selected set from the local sets    
-    def __do_remove(self):
-        r = self.__table.currentRow()
-        if r != -1:
-            name = self.__table.item(r, 0).text()
-            sets = self.__sets[self.__get_loop_item()]
-            del sets[name]
-            self.__table.removeRow(r);
-            self.__populate_table()
+    # None
     
     #===========================
     # Timeout tab events
@@ -394,11 +301,7 @@ class Config(QDialog):
     
     #===========================
     # VNA tab events
-    def __vna_state_changed(self):
-        if self.__vnacb.isChecked():
-            self.__model[STATE][VNA_ENABLED] = True
-        else:
-            self.__model[STATE][VNA_ENABLED] = False
+    # None
     
     #===========================
     # Common button events
@@ -408,32 +311,40 @@ class Config(QDialog):
         # Changes take effect immediately as nothing uses cached values
         # Model is saved on exit
             
-        # Save any updates    
-        self.__model[CONFIG][ARDUINO][PORT] = self.__serialporttxt.text()
-        self.__model[CONFIG][ARDUINO][MOTOR_SPEED][MINIMUM] = self.__mintxt.value()
-        self.__model[CONFIG][ARDUINO][MOTOR_SPEED][MAXIMUM] = self.__maxtxt.value()
-        self.__model[CONFIG][ARDUINO][MOTOR_SPEED][DEFAULT] = self.__deftxt.value()
-        
-        self.__model[CONFIG][CAL][STEPS][STEPS_1] = self.__step1txt.value()
-        self.__model[CONFIG][CAL][STEPS][STEPS_2] = self.__step2txt.value()
-        self.__model[CONFIG][CAL][STEPS][STEPS_3] = self.__step3txt.value()
-                                         
-        self.__model[CONFIG][TIMEOUTS][CALIBRATE_TIMEOUT] = self.__caltotxt.value()
-        self.__model[CONFIG][TIMEOUTS][TUNE_TIMEOUT] = self.__tunetotxt.value()
-        self.__model[CONFIG][TIMEOUTS][RES_TIMEOUT] = self.__restotxt.value()
-        self.__model[CONFIG][TIMEOUTS][MOVE_TIMEOUT] = self.__movetotxt.value()
-        self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT] = self.__shorttotxt.value()
-        
-        if self.__vnacb.isChecked():
-            self.__model[CONFIG][VNA][VNA_ENABLED] = True
-        else:
-            self.__model[CONFIG][VNA][VNA_ENABLED] = False
-        
-        # Save model
-        persist.saveCfg(CONFIG_PATH, self.__model)
+        # Save any updates
+        # One update per model section and only for fields that differ
+        # Tabs that were never opened are unchanged
+        dirty = False
+        for index, built in self.__tab_built.items():
+            if built and self.__tabs[index][3]():
+                dirty = True
+        
+        # Save model in the background so the dialog stays responsive
+        # Nothing to write if no field changed
+        if dirty:
+            persist.saveCfgAsync(CONFIG_PATH, self.__model)
+    
+    # Load spin boxes keyed by model key from a model section
+    def __load_spins(self, widgets, section):
+        for key, sb in widgets.items():
+            with QtCore.QSignalBlocker(sb):
+                sb.setValue(section[key])
+    
+    # Current spin box values keyed by model key
+    def __values(self, widgets):
+        return {key: sb.value() for key, sb in widgets.items()}
+    
+    # Write only the values that differ into a model section
+    # Returns True if anything was changed
+    def __update_section(self, section, values):
+        changed = {k: v for k, v in values.items() if section[k] != v}
+        section.update(changed)
+        return len(changed) > 0
     
     # Cancel changes    
     def __do_cancel(self):
+        # The widgets are the only working copy so put back the model values
+        self.reload()
         self.close()
     
     # Close
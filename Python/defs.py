@@ -47,7 +47,7 @@ LIM_1 = 'LIM_1'
 LIM_2 = 'LIM_2'
 LIM_3 = 'LIM_3'
 CAL = 'CAL'
-HOME = 'HOME'
+# HOME (defined with the activities) also keys the home feedback value
 SETS = 'SETS'
 CAL_S1 = 'CAL_S1'
 CAL_S2 = 'CAL_S2'
@@ -79,8 +79,7 @@ MAIN_WIN = 'MAIN_WIN'
 CONFIG_WIN = 'CONFIG_WIN'
 SETPOINT_WIN = 'SETPOINT_WIN'
 CALVIEW_WIN = 'CALVIEW_WIN'
-# Arduino section
-ARDUINO = 'ARDUINO'
+# Arduino section, ARDUINO as for configuration
 ONLINE = 'ONLINE'
 MOTOR_POS = 'MOTOR_POS'
 MOTOR_FB = 'MOTOR_FB'
@@ -98,7 +97,11 @@ CLOSE_TUNE = 'CLOSE_TUNE'
 CONFIG_PATH = '../config/flexi_loop.cfg'
 # Run idle processing every TICKER ms
 IDLE_TICKER = 250
+# Idle passes per second, timeouts in seconds are multiplied by this
+IDLE_PASSES_PER_SEC = 1000 // IDLE_TICKER
 IDLE_LONG_TICKER = 1000
+# Save window geometry once it has been still for GEOM_TICKER ms
+GEOM_TICKER = 150
 # Check Arduino every HEARTBEAT_TIMER ms
 HEARTBEAT_TIMER = 10000
 
@@ -137,7 +140,6 @@ LIMIT = 'Limit'
 ABORT = 'Abort'
 STOP = 'Stop'
 DEBUG = 'Dbg'
-NONE = 'None'
 
 # Cal manual return values
 CAL_SUCCESS = 'CalSuccess'
@@ -184,14 +186,14 @@ MOVE_ABS = 'MOVE_ABS'
 MOVE_PERCENT = 'MOVE_PERCENT'
 
 # Widget states
-W_OFF_LINE = 'WOffLine'
-W_LONG_RUNNING = 'WLongRunning'
-W_FREE_RUNNING = 'WFreeRunning'
-W_TRANSIENT = 'Transient'
-W_NO_LIMITS = 'WNoLimits'
-W_LIMITS_DELETE = 'WLimitsDelete'
-W_CALIBRATED = 'WCalibrated'
-W_OTHER_CALIBRATED = 'WOtherCalibrated'
+W_OFF_LINE = 0
+W_LONG_RUNNING = 1
+W_FREE_RUNNING = 2
+W_TRANSIENT = 3
+W_NO_LIMITS = 4
+W_LIMITS_DELETE = 5
+W_CALIBRATED = 6
+W_OTHER_CALIBRATED = 7
 
 # Manual calibration data states
 MANUAL_IDLE = 0
@@ -200,10 +202,10 @@ MANUAL_DATA_AVAILABLE = 2
 MANUAL_NEXT = 3
 
 # Message highlights
-MSG_INFO = 'MSG_INFO'
-MSG_STATUS = 'MSG_STATUS'
-MSG_ALERT = 'MSG_ALERT'
-MSG_DEBUG = 'MSG_DEBUG'
+MSG_INFO = 0
+MSG_STATUS = 1
+MSG_ALERT = 2
+MSG_DEBUG = 3
 
 
 
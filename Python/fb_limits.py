@@ -25,8 +25,8 @@
 
 # Python imports
 import os,sys
-from time import sleep
 import threading
+import queue
 import traceback
 import logging
 
@@ -46,6 +46,7 @@ class FBLimits(threading.Thread):
         
         # Parameters
         self.__model = model
+        self.__cal = model[CONFIG][CAL]
         self.__s_q = s_q
         self.__serial_comms = comms
         self.__cb = cb
@@ -53,82 +54,103 @@ class FBLimits(threading.Thread):
         
         # Instance vars
         self.__event = threading.Event()
-        self.one_pass = False
-        self.term = False
+        # Holds at most the latest (home, max) limits to set, None to terminate
+        self.__work_q = queue.Queue(maxsize=1)
+        self.__term_evt = threading.Event()
         self.__home_limit = None
         self.__max_limit = None
         self.__wait_for = None
     
+    # Limits in the model differ from those last set
     def has_change(self):
-        homevalue = self.__model[CONFIG][CAL][HOME]
-        maxvalue = self.__model[CONFIG][CAL][MAX]
-        if homevalue != self.__home_limit or maxvalue != self.__max_limit:
-            return True
-        return False
+        return self.__cal[HOME] != self.__home_limit or self.__cal[MAX] != self.__max_limit
     
-    # Perform one tuning pass for given loop and frequency
-    def do_one_pass(self):
-        self.one_pass = True
+    # Set the given limits if they differ from those last set
+    def do_one_pass(self, homevalue, maxvalue):
+        self.__offer((homevalue, maxvalue))
         
     # Terminate instance
     def terminate(self):
-        self.term = True
+        self.__term_evt.set()
+        self.__offer(None)
+    
+    # Queue work, replacing anything not yet picked up
+    def __offer(self, item):
+        try:
+            self.__work_q.put_nowait(item)
+        except queue.Full:
+            try:
+                self.__work_q.get_nowait()
+            except queue.Empty:
+                pass
+            self.__work_q.put_nowait(item)
         
     def run(self):
         # Run until terminate
-        while not self.term:
-            # Wait until told to execute
-            while not self.one_pass:
-                sleep(0.1)
-                if self.term: break
-            if self.term: break
-            self.one_pass = False
+        while not self.__term_evt.is_set():
+            # Sleep until told to execute, terminate always sets the flag before queuing
+            item = self.__work_q.get()
+            if item is None or self.__term_evt.is_set(): break
             
             # Check for change in limits
             try:
-                homevalue = self.__model[CONFIG][CAL][HOME]
-                maxvalue = self.__model[CONFIG][CAL][MAX]
+                homevalue, maxvalue = item
                 if homevalue != self.__home_limit or maxvalue != self.__max_limit:
                     # We have a change
-                    # Need to steal the serial comms callback
-                    self.__serial_comms.steal_callback(self.limits_cb)
-                    self.__home_limit = homevalue
-                    self.__max_limit = maxvalue
-                    self.__s_q.put(('set_home', [self.__home_limit]))
-                    self.__wait_for = HOMEVAL
-                    self.__event.wait()
-                    self.__event.clear()
-                    self.__s_q.put(('set_max', [self.__max_limit]))
-                    self.__wait_for = MAXVAL
-                    self.__event.wait()
-                    self.__event.clear()
-                    # Give back callback
-                    self.__serial_comms.restore_callback()
-                    self.__cb
+                    self.__set_limits(homevalue, maxvalue)
             except Exception as e:
-                self.logger.warn("Exception in fb_limits [{}]".format(e))
+                self.logger.warning("Exception in fb_limits [%s]", e)
                 self.__msg_cb('Exception in fb_limits, please check log.', MSG_ALERT)
                 break
             self.__cb((FBLIMITS, (True, "", [])))
         print("FBLimits thread  exiting...")
     
+    # Send changed limits to the Arduino
+    def __set_limits(self, homevalue, maxvalue):
+        # Need to steal the serial comms callback
+        # Status and debug keep flowing to the usual consumer meanwhile
+        self.__serial_comms.steal_callback(self.limits_cb, (STATUS, DEBUG))
+        try:
+            self.__home_limit = homevalue
+            self.__max_limit = maxvalue
+            self.__s_q.put(('set_home', [self.__home_limit]))
+            self.__wait_for = HOMEVAL
+            self.__event.wait()
+            self.__event.clear()
+            self.__s_q.put(('set_max', [self.__max_limit]))
+            self.__wait_for = MAXVAL
+            self.__event.wait()
+            self.__event.clear()
+        finally:
+            # Always give back callback
+            self.__serial_comms.restore_callback()
+    
     # Stolen callback    
     def limits_cb(self, data):
         (name, (success, msg, val)) = data
         if name == self.__wait_for:
             self.__event.set()
-        elif name == STATUS:
-            # Very infrequent abd short lived so ignore
-            pass
-        elif name == DEBUG:
-            # Very infrequent abd short lived so ignore
-            pass
-        elif name == ABORT:
-            # Just release whatever was going on
-            # It should then pick up the abort flag
-            self.__event.set() 
+            return
+        handler = self.__HANDLERS.get(name)
+        if handler is not None:
+            handler(self)
         else:
-            self.logger.info ("Waiting for {}, but got {}!".format(self.__wait_for, name))
+            self.logger.info("Waiting for %s, but got %s!", self.__wait_for, name)
             self.__msg_cb("Waiting for {}, but got {}!".format(self.__wait_for, name))
-            self.__event.set() 
+            self.__event.set()
+    
+    # Status and debug are passed through to the usual consumer so ignore
+    def __ignore(self):
+        pass
+    
+    # Just release whatever was going on, it should then pick up the abort flag
+    def __release(self):
+        self.__event.set()
+    
+    # Responses other than the one waited for, shared by all instances
+    __HANDLERS = {
+        STATUS: __ignore,
+        DEBUG: __ignore,
+        ABORT: __release,
+    } 
             
\ No newline at end of file
@@ -98,11 +98,40 @@ flexi_loop_model = {
 # Manage model
 flexi_loop_model_clone = None
 
+# Copy the model tree
+# Only dicts and lists are mutable, all leaves are shared as is
+def _fast_clone(m):
+    if isinstance(m, dict):
+        return {k: _fast_clone(v) for k, v in m.items()}
+    if isinstance(m, list):
+        return [_fast_clone(v) for v in m]
+    return m
+
+# A fresh mutable copy of the default model
+def default_model():
+    return _fast_clone(flexi_loop_model)
+
 def copy_model(model):
     global flexi_loop_model_clone
-    flexi_loop_model_clone = copy.deepcopy(model)
+    flexi_loop_model_clone = _fast_clone(model)
     
 def restore_model(model):
     global flexi_loop_model_clone
     if flexi_loop_model_clone != None:
-        model = copy.deepcopy(flexi_loop_model_clone)
+        # Restore in place so the caller's model is updated
+        _restore(model, flexi_loop_model_clone)
+
+# Copy src into dst keeping every dict and list in dst
+# Dialogs and workers hold references to sections and window geometry lists
+def _restore(dst, src):
+    if isinstance(dst, dict):
+        for k in list(dst):
+            if k not in src:
+                del dst[k]
+        for k, v in src.items():
+            if k in dst and type(dst[k]) is type(v) and isinstance(v, (dict, list)):
+                _restore(dst[k], v)
+            else:
+                dst[k] = _fast_clone(v)
+    else:
+        dst[:] = _fast_clone(src)
@@ -24,8 +24,9 @@
 #
 
 # Python imports
-import os
+import os, sys
 import pickle
+import threading
 
 # Application imports
 
@@ -37,7 +38,7 @@ def getSavedCfg(path):
     if os.path.exists(path):
         try:       
             f = open(path, 'rb')
-            cfg = pickle.load(f)
+            cfg = _intern_keys(pickle.load(f))
         except Exception as e:
             # Error retrieving configuration file
             print('Read Configuration File exception [{}]'.format(e))
@@ -49,18 +50,97 @@ def getSavedCfg(path):
     return cfg
     
 def saveCfg(path, cfg):
+    data = _dumps(cfg)
+    if data is not None:
+        _write(path, data, _next_seq(path))
+
+# Save from the GUI thread without waiting for the file write
+# The model is pickled here so later changes do not leak into this save
+# Saves made while a write is in progress collapse into the latest one
+def saveCfgAsync(path, cfg):
+    global _writing
+    data = _dumps(cfg)
+    if data is None:
+        return
+    with _lock:
+        _pending[path] = (data, _bump_seq())
+        if _writing:
+            return
+        _writing = True
+    threading.Thread(target=_write_pending, daemon=True).start()
+
+#=======================================================
+# Private
+# Returns None if the configuration cannot be pickled
+def _dumps(cfg):
     try:
-        dir, file = os.path.split(path)
-        if not os.path.exists(dir):
-            os.mkdir(dir)
-        f = open(path, 'wb')
-        pickle.dump(cfg, f)
+        return pickle.dumps(cfg, pickle.HIGHEST_PROTOCOL)
     except Exception as e:
         # Error saving configuration file
         print('Save Configuration File exception [{}]'.format(e))
-    finally:
+        return None
+
+# Unpickled keys are new string objects
+# Interning them lets lookups with the defs constants match on identity
+def _intern_keys(d):
+    if not isinstance(d, dict):
+        return d
+    return {(sys.intern(k) if isinstance(k, str) else k): _intern_keys(v) for k, v in d.items()}
+
+# Pending background saves {path: (data, seq)}
+_pending = {}
+_writing = False
+_lock = threading.Lock()
+# Writes are serialised and an older snapshot never replaces a newer one
+_write_lock = threading.Lock()
+_seq = 0
+_written = {}
+
+def _next_seq(path):
+    with _lock:
+        # A direct save supersedes any waiting background save
+        _pending.pop(path, None)
+        return _bump_seq()
+
+# Call with _lock held
+def _bump_seq():
+    global _seq
+    _seq += 1
+    return _seq
+    
+def _write_pending():
+    global _writing
+    while True:
+        with _lock:
+            if not _pending:
+                _writing = False
+                return
+            path, (data, seq) = _pending.popitem()
+        _write(path, data, seq)
+
+def _write(path, data, seq):
+    with _write_lock:
+        if _written.get(path, 0) > seq:
+            return
+        # Write a temporary file and swap it in so a crash never leaves a truncated config
+        tmp = path + '.tmp'
         try:
-            f.close()
-        except:
-            pass
-        
\ No newline at end of file
+            dir, file = os.path.split(path)
+            if not os.path.exists(dir):
+                os.mkdir(dir)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            # Only a snapshot that reached the file supersedes older ones
+            _written[path] = seq
+        except Exception as e:
+            # Error saving configuration file
+            print('Save Configuration File exception [{}]'.format(e))
+        finally:
+            if os.path.exists(tmp):
+                try:
+                    os.unlink(tmp)
+                except:
+                    pass
@@ -43,6 +43,7 @@ from PyQt5.QtWidgets import (
         QStatusBar,
         QTabWidget,
         QTableWidget,
+        QTableView,
         QInputDialog,
         QFileDialog,
         QFrame,
@@ -57,10 +58,12 @@ from PyQt5.QtWidgets import (
         QCheckBox,
         QRadioButton,
         QSpinBox,
+        QDoubleSpinBox,
         QListWidget,
         QAction,
         QWidget,
         QGridLayout,
+        QFormLayout,
         QVBoxLayout,
         QHBoxLayout,
         QTableWidgetItem
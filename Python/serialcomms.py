@@ -26,10 +26,9 @@
 # Python imports
 import serial
 import os,sys
-from time import sleep
+from time import sleep, monotonic
 import queue
 import threading
-import traceback
 import logging
 
 # Application imports
@@ -38,8 +37,14 @@ from defs import *
 # Verbose flag
 VERB = True
 
-# Pause at end of processing SLEEP_TIMER secs
-SLEEP_TIMER = 0.1
+# Block in a serial read for at most ABORT_POLL secs so aborts are seen promptly
+ABORT_POLL = 0.1
+# Allowance on the nominal command timeouts
+# Responses have always been given about three times the nominal time and the long moves rely on it
+RESP_TIMEOUT_FACTOR = 3
+# Attempts at a command and the pause in secs between them
+MAX_RETRIES = 5
+RETRY_BACKOFF = 1.2
 
 #=====================================================
 # Manage all serial comms to the Arduino
@@ -62,11 +67,39 @@ class SerialComms(threading.Thread):
         
         # Instance vars
         self.__originalcb = main_callback
-        self.term = False
+        # Unsolicited frames still routed to the original callback while stolen
+        self.__passthrough = ()
+        self.__term = threading.Event()
+        # Abort raised from another thread and writes shared with it
+        self.__abort_evt = threading.Event()
+        self.__tx_lock = threading.Lock()
         self.__port = None
         self.__ser = None
-        self.__ticks = (HEARTBEAT_TIMER/1000)/SLEEP_TIMER
-        self.__heartbeat = self.__ticks
+        # Receive buffer shared by every read_resp
+        # Holds any partial frame read past a response until the next read
+        self.__rx = bytearray()
+        self.__hb_interval = HEARTBEAT_TIMER/1000
+        self.__next_heartbeat = monotonic() + self.__hb_interval
+        # Command name to handler
+        self.__disp_tab = {
+            'speed': self.__speed,
+            'home': self.__home,
+            'max': self.__maximum,
+            'set_home': self.__set_home,
+            'set_max': self.__set_max,
+            'pos': self.__pos,
+            'move': self.__move,
+            'nudge_fwd': self.__nudge_fwd,
+            'nudge_rev': self.__nudge_rev,
+            'run_fwd': self.__run_fwd,
+            'run_rev': self.__run_rev,
+            'free_fwd': self.__free_fwd,
+            'free_rev': self.__free_rev,
+            'free_stop': self.__free_stop,
+            'relay_on' : self.__relay_on,
+            'relay_off' : self.__relay_off,
+            'abort' : self.__abort,
+        }
 
     # Attempt connect to Arduino
     def connect(self, port = None):
@@ -82,32 +115,56 @@ class SerialComms(threading.Thread):
         
         if self.__app: self.__model[STATE][ARDUINO][ONLINE] = True
         self.__ser.reset_input_buffer()
+        self.__rx.clear()
         return True
     
     # Caller changes callback     
-    def steal_callback( self, new_callback) :
+    # Status, limit and debug frames named in passthrough continue to the original callback
+    def steal_callback( self, new_callback, passthrough = ()) :
         """ Steal the dispatcher callback """
+        self.__passthrough = passthrough
         self.__cb = new_callback
     
     # Caller restors callback
     def restore_callback(self) :
         """ Restore the dispatcher callback """
         self.__cb = self.__originalcb
+        self.__passthrough = ()
         
     # Terminate instance
     def terminate(self):
         """ Thread terminating """
-        self.term = True
+        self.__term.set()
+        # Wake the thread if it is waiting for a command
+        self.__q.put((None, None))
+    
+    # Abort from any thread without waiting behind the command queue
+    def abort_now(self):
+        """ Abort current activity """
+        # Flag first so no command taken from the queue after this is written
+        self.__abort_evt.set()
+        # Commands still waiting are cancelled by the abort
+        while True:
+            try:
+                self.__q.get_nowait()
+            except queue.Empty:
+                break
+            self.__q.task_done()
+        try:
+            self.__write(b'z;')
+        except Exception as e:
+            if self.__app: self.logger.warning("Failed to send abort [%s]", e)
+        # Wake the thread if it is waiting for a command
+        self.__q.put((None, None))
     
     # Thread entry point
     def run(self):
         global VERB
         if self.__app:  self.logger.info("Running...")
-        while not self.term:
+        while not self.__term.is_set():
             # Heartbeat
-            self.__heartbeat -= 1
-            if self.__heartbeat <= 0:
-                self.__heartbeat = self.__ticks
+            if monotonic() >= self.__next_heartbeat:
+                self.__next_heartbeat = monotonic() + self.__hb_interval
                 # Time to check
                 heartbeat = True
                 try:
@@ -115,6 +172,9 @@ class SerialComms(threading.Thread):
                     VERB = False
                     name, (success, msg, val) = self.send(b"y;", 1)
                     VERB = verb
+                    if name == ABORT:
+                        # An abort arrived during the heartbeat so pass it on
+                        self.__cb((name, (success, msg, val)))
                     if not success:
                         heartbeat = False
                 except:
@@ -131,20 +191,28 @@ class SerialComms(threading.Thread):
             
             # Process messages
             try:
-                if self.__q.qsize() > 0:
-                    if self.__app and VERB: self.logger.info("Q sz: {}, ".format(self.__q.qsize()))
-                    while self.__q.qsize() > 0:
-                        name, args = self.__q.get()
-                        if self.__app and VERB: self.logger.info("Name: {}, Args: {}".format(name, args))
-                        # Execute command, responses are by callback
-                        self.__dispatch(name, args)
-                        # Here after command/response sequence
-                        self.__q.task_done()
-                else:
-                    sleep(SLEEP_TIMER)
+                # Wake for a command, terminate or the next heartbeat
+                wait = max(0, self.__next_heartbeat - monotonic())
+                try:
+                    name, args = self.__q.get(timeout=wait)
+                except queue.Empty:
+                    continue
+                if name is None:
+                    # Terminate or abort sentinel
+                    self.__q.task_done()
+                    if self.__abort_evt.is_set():
+                        # Abort with no command running, just report it
+                        self.__abort_evt.clear()
+                        self.__cb((ABORT, (True, "User abort!", [])))
+                    continue
+                if self.__app and VERB: self.logger.info("Name: %s, Args: %s", name, args)
+                # Execute command, responses are by callback
+                self.__dispatch(name, args)
+                # Here after command/response sequence
+                self.__q.task_done()
             except Exception as e:
                 # Something went wrong
-                if self.__app: self.logger.warn('Exception processing serial command! Serial comms will restart but any current activity will fail. {}, [{}]'.format(e, traceback.print_exc()))
+                if self.__app: self.logger.warning('Exception processing serial command! Serial comms will restart but any current activity will fail. [%s]', e, exc_info=True)
                 break
                 
         if self.__app: self.logger.info("Comms thread exiting...")
@@ -154,35 +222,17 @@ class SerialComms(threading.Thread):
     # Command execution
     # Dispatch to handler
     def __dispatch(self, name, args):
-        disp_tab = {
-            'speed': self.__speed,
-            'home': self.__home,
-            'max': self.__maximum,
-            'set_home': self.__set_home,
-            'set_max': self.__set_max,
-            'pos': self.__pos,
-            'move': self.__move,
-            'nudge_fwd': self.__nudge_fwd,
-            'nudge_rev': self.__nudge_rev,
-            'run_fwd': self.__run_fwd,
-            'run_rev': self.__run_rev,
-            'free_fwd': self.__free_fwd,
-            'free_rev': self.__free_rev,
-            'free_stop': self.__free_stop,
-            'relay_on' : self.__relay_on,
-            'relay_off' : self.__relay_off,
-            'abort' : self.__abort,
-        }
+        handler = self.__disp_tab.get(name)
+        if handler is None:
+            if self.__app: self.logger.warning("Unknown serial command %s", name)
+            return
         # Execute and return response
-        self.__cb(disp_tab[name](args))
+        self.__cb(handler(args))
     
     # Execute Arduino function and wait response    
+    # The controller reads numeric arguments up to the '.' so they are sent as integers
     def __speed(self, args):
-        speed = args[0]
-        b = bytearray(b"s,")
-        b += str(speed).encode('utf-8')
-        b += b'.;'
-        return self.send(b, 2)
+        return self.send(b"s,%d.;" % int(args[0]), 2)
             
     def __home(self, args):
         return self.send(b"h;", 30)
@@ -191,28 +241,16 @@ class SerialComms(threading.Thread):
         return self.send(b"x;", 30)
     
     def __set_home(self, args):
-        h = args[0]
-        b = bytearray(b"j,")
-        b += str(h).encode('utf-8')
-        b += b'.;'
-        return self.send(b, 2)
+        return self.send(b"j,%d.;" % int(args[0]), 2)
             
     def __set_max(self, args):
-        m = args[0]
-        b = bytearray(b"k,")
-        b += str(m).encode('utf-8')
-        b += b'.;'
-        return self.send(b, 2)
+        return self.send(b"k,%d.;" % int(args[0]), 2)
     
     def __pos(self, args):
         return self.send(b"p;", 2)
             
     def __move(self, args):
-        pos = args[0]
-        b = bytearray(b"m,")
-        b += str(pos).encode('utf-8')
-        b += b'.;'
-        return self.send(b, 30)
+        return self.send(b"m,%d.;" % int(args[0]), 30)
     
     def __nudge_fwd(self, args):
         return self.send(b"f;", 2)
@@ -221,18 +259,10 @@ class SerialComms(threading.Thread):
         return self.send(b"r;", 2)
        
     def __run_fwd(self, args):
-        ms = args[0]
-        b = bytearray(b"w,")
-        b += str(ms).encode('utf-8')
-        b += b'.;'
-        return self.send(b, 10)
+        return self.send(b"w,%d.;" % int(args[0]), 10)
             
     def __run_rev(self, args):
-        ms = args[0]
-        b = bytearray(b"v,")
-        b += str(ms).encode('utf-8')
-        b += b'.;'
-        return self.send(b, 10)
+        return self.send(b"v,%d.;" % int(args[0]), 10)
     
     def __free_fwd(self, args):
         return self.send(b"c;", 30)
@@ -252,33 +282,30 @@ class SerialComms(threading.Thread):
     def __abort(self, args):
         # There is no response to an abort it just forces a return
         # from any move in progress or absorbs it if no activity
-        self.__ser.write(b"z;")
-        self.__ser.flush()
+        self.__write(b"z;")
         return (ABORT, (True, "User abort!", []))
         
     # ===============================================================
     # Send a command to the Arduino
     def send(self, cmd, timeout):
-        val = 0
-        msg = ""
-        retries = 5
-        while(1):
-            if self.__app and VERB: self.logger.info("Sending {}".format(cmd))
-            self.__ser.write(cmd)
-            self.__ser.flush()
-            retries -= 1
-            sleep(0.1)
+        # Verbose is fixed for the duration of a command
+        # and skipped entirely when the logger would drop it
+        verb = self.__app and VERB and self.logger.isEnabledFor(logging.INFO)
+        for attempt in range(MAX_RETRIES):
+            if attempt > 0:
+                if verb: self.logger.info("Command failed, retrying...")
+                # Back off before the retry
+                sleep(RETRY_BACKOFF)
+            if verb: self.logger.info("Sending %s", cmd)
+            if not self.__write_cmd(cmd):
+                # Aborted before the command went out
+                return (ABORT, (True, "User abort!", []))
+            # read_resp blocks until the response arrives
             resp = self.read_resp(timeout)
-            if resp[1][0] == False:
-                sleep(0.2)
-                if self.__app and VERB: self.logger.info("Command failed, retrying...")
-                if retries <= 0:
-                    msg = "Command failed after 5 retries" 
-                    return (resp[0], (False, msg, []))
-            else:
-                break
-            sleep(1)
-        return resp
+            if resp[1][0]:
+                return resp
+        msg = "Command failed after {} attempts".format(MAX_RETRIES)
+        return (resp[0], (False, msg, []))
     
     # ===============================================================
     # Read all responses for a command.
@@ -286,71 +313,111 @@ class SerialComms(threading.Thread):
         # Wait for a response.
         # Send all STATUS responses
         # Return RESPONSE responses
-        acc = ""
-        val = 0
-        success = False
+        verb = self.__app and VERB and self.logger.isEnabledFor(logging.INFO)
+        ser = self.__ser
+        # Chunked reads can run past the response, so acc may start with
+        # the front of a frame read last time and is only cleared on a failed read
+        acc = self.__rx
         name = ""
         msg = ""
         val = []
         # timeout is secs to wait for a response
-        resp_timeout = timeout*2
+        deadline = monotonic() + timeout*RESP_TIMEOUT_FACTOR
         while(1):
             # Check abort
+            if self.__abort_evt.is_set():
+                # Already sent by abort_now
+                self.__abort_evt.clear()
+                acc.clear()
+                return (ABORT, (True, "User abort!", val))
             r = self.__check_stop_abort()
             if r == ABORT:
                 # We return an abort instead of the given command
+                acc.clear()
                 return (ABORT, (True, "User abort!", val))
             elif r == STOP:
                 if self.__app: self.logger.info("Stop motor after forward or reverse command.")
-            # Read a single character
-            chr = self.__ser.read().decode('utf-8')
-            if chr == '':
-                # Timeout on read
-                if resp_timeout <= 0:
-                    # Timeout on waiting for a response
-                    if self.__app and VERB: self.logger.info("Response timeout!")
-                    msg = "Response timeout!"
+            # Read whatever has arrived, blocking in the port for at least one character
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                # Timeout on waiting for a response
+                if verb: self.logger.info("Response timeout!")
+                msg = "Response timeout!"
+                acc.clear()
+                break
+            self.__set_read_timeout(min(ABORT_POLL, remaining))
+            chunk = ser.read(ser.in_waiting or 1)
+            if len(chunk) == 0:
+                # Nothing yet, check for abort and continue waiting
+                continue
+            acc += chunk
+            # Process each complete frame
+            response = None
+            while(1):
+                n = acc.find(b';')
+                if n == -1:
                     break
-                else:
-                    # Continue waiting
-                    resp_timeout -= 1
-                    sleep(0.5)
-                    continue
-            acc = acc + chr
-            if chr == ";":
                 # Found terminator character
-                if "Status" in acc:
+                # Leading whitespace is the line ending from a println in the controller
+                frame = bytes(acc[:n+1]).lstrip()
+                del acc[:n+1]
+                # Unsolicited frames are identified by their leading name
+                if frame.startswith(b"Status"):
                     # Its a status message so return this directly
-                    #if VERB: self.logger.info("Status: {0}".format(acc))
-                    self.__cb(self.__encode(acc))
-                    acc = ""
+                    #if VERB: self.logger.info("Status: {0}".format(frame))
+                    self.__route(self.__encode(frame))
                     continue
-                if "Limit" in acc:
-                    self.__cb(self.__encode(acc))
+                if frame.startswith(b"Limit"):
+                    self.__route(self.__encode(frame))
                     continue
-                elif "Dbg" in acc:
+                elif frame.startswith(b"Dbg"):
                     # Its a debug message so return this directly
-                    #if VERB: self.logger.info("Dbg: {0}".format(acc))
-                    self.__cb(self.__encode(acc))
-                    acc = ""
+                    #if VERB: self.logger.info("Dbg: {0}".format(frame))
+                    self.__route(self.__encode(frame))
                     continue
                 # Otherwise its a response to the command
-                if self.__app and VERB: self.logger.info("Response: {}".format(acc))
-                if self.__ser.in_waiting > 0:
-                    # Still data in buffer, probably should not happen!
-                    # Dump response and use this data
-                    if self.__app and VERB: self.logger.info("More data available {} - collecting... ".format(self.__ser.in_waiting))
-                    acc = ""
-                    continue
-                success = True
-                break
-        if success:
-            return(self.__encode(acc))
+                if verb: self.logger.info("Response: %s", frame.decode("utf-8", "replace"))
+                if response is not None:
+                    # More than one response, probably should not happen!
+                    # Dump the earlier response and use this data
+                    if verb: self.logger.info("More data available - collecting... ")
+                response = frame
+            if response is not None:
+                return self.__encode(response)
+        return (name, (False, msg, val))
+    
+    # Writes may come from abort_now on another thread
+    def __write(self, data):
+        with self.__tx_lock:
+            self.__ser.write(data)
+    
+    # Write a command unless an abort is pending
+    # Checked under the write lock so the command is either refused or goes out before the abort
+    def __write_cmd(self, cmd):
+        with self.__tx_lock:
+            if self.__abort_evt.is_set():
+                # Already sent by abort_now
+                self.__abort_evt.clear()
+                return False
+            self.__ser.write(cmd)
+            return True
+    
+    # Setting the port timeout reconfigures the port so only do it on a change
+    def __set_read_timeout(self, timeout):
+        if self.__ser.timeout != timeout:
+            self.__ser.timeout = timeout
+    
+    # ===============================================================
+    # Send an unsolicited frame to whoever wants it
+    def __route(self, resp):
+        if resp[0] in self.__passthrough:
+            self.__originalcb(resp)
         else:
-            return (name, (success, msg, val))
-
+            self.__cb(resp)
+    
     # ===============================================================
     # Encode response
+    # data is the raw frame including the ';' terminator
     def __encode(self, data):
         # Called when we have a good response
         success = False
@@ -358,24 +425,25 @@ class SerialComms(threading.Thread):
         msg = ""
         val = []
         
-        # Strip data from text
-        n = data.find(":")
+        # Strip data from frame
+        # Names are interned so comparing them with the defs constants is an identity check
+        n = data.find(b":")
         if n == -1:
             # No parameters
             success = True
-            name = data[:len(data) - 1]
+            name = sys.intern(data[:len(data) - 1].decode('utf-8'))
         else:
             # There are parameters
             success = True
             # We only expect one parameter at the moment
-            name = data[:n]
+            name = sys.intern(data[:n].decode('utf-8'))
             param = data[n+1:len(data)-1]
             param = param.strip()
             if param.isdigit():
                 val.append(int(param))
             else:
                 # Treat as a single string parameter
-                val.append(param)
+                val.append(param.decode('utf-8'))
         return (name, (success, msg, val))
 
     # ===============================================================
@@ -387,12 +455,10 @@ class SerialComms(threading.Thread):
         if self.__q.qsize() > 0:
             name, args = self.__q.get()
             if name == 'abort':
-                self.__ser.write(b'z;')
-                self.__ser.flush()
+                self.__write(b'z;')
                 return ABORT
             elif name == 'free_stop':
-                self.__ser.write(b'e;')
-                self.__ser.flush()
+                self.__write(b'e;')
                 return STOP 
         return NONE
     
@@ -34,8 +34,59 @@ from qt_inc import *
 # Application imports
 from defs import *
 from utils import *
-import api
+import style
+import tablemodel
 
+# Table model over the setpoints for a loop
+# Rows are shown in the order the setpoints were added
+class SetpointTableModel(tablemodel.PointTableModel):
+    
+    def __init__(self, model):
+        super(SetpointTableModel, self).__init__(('Name','Position %','Freq','SWR'))
+        
+        self.__model = model
+    
+    #=======================================================
+    # PUBLIC
+    #
+    # Replace the setpoints being viewed
+    # The row builder and converter are looked up once for the whole table
+    # Returns True if the view was reset
+    def set_points(self, sps):
+        make_row = self.__make_row
+        to_percent = analog_to_percent_fn(self.__model)
+        return self._reset_rows([make_row(to_percent, name, fb, freq, swr)
+                                 for name, (fb, freq, swr) in sps.items()])
+    
+    # Add a setpoint or update the row already holding the name
+    def set_point(self, name, fb, freq, swr):
+        row = self.__make_row(analog_to_percent_fn(self.__model), name, fb, freq, swr)
+        for index, (_, cells) in enumerate(self._rows):
+            if cells[0] == name:
+                self._rows[index] = row
+                self.dataChanged.emit(self.index(index, 0), self.index(index, len(self._headers)-1))
+                return
+        self.beginInsertRows(QtCore.QModelIndex(), len(self._rows), len(self._rows))
+        self._rows.append(row)
+        self.endInsertRows()
+    
+    # Drop a row
+    def remove_row(self, row):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+    
+    # Setpoint name for a table row
+    def name(self, row):
+        return self._rows[row][1][0]
+    
+    #=======================================================
+    # PRIVATE
+    #
+    # Name is already a string, the rest are numeric in the model
+    def __make_row(self, to_percent, name, fb, freq, swr):
+        return (fb, (name, str(to_percent(fb)), str(freq), str(swr)))
+    
 # Setpoint config dialog        
 class Setpoint(QDialog):
     
@@ -49,22 +100,19 @@ class Setpoint(QDialog):
         self.__msgs = msgs
         self.__cb = callback
         
+        # Model sections used by this dialog
+        # Sections are updated in place and never replaced so these stay live
+        self.__cal = model[CONFIG][CAL]
+        self.__setpoints = model[CONFIG][SETPOINTS]
+        self.__ard_state = model[STATE][ARDUINO]
+        self.__geom = model[STATE][WINDOWS][SETPOINT_WIN]
+        
         # Local vars
         self.__loop = -1
-        self.__pos_lookup = {}
+        self.__loop_key = SP_L1
      
         # Set the back colour
-        palette = QPalette()
-        palette.setColor(QPalette.Background, QColor(149,142,132))
-        self.setPalette(palette)
-
-        # Set the tooltip style
-        QToolTip.setFont(QFont('SansSerif', 10))
-        self.setStyleSheet('''QToolTip { 
-                           background-color: darkgray; 
-                           color: black; 
-                           border: #8ad4ff solid 1px
-                           }''')
+        self.setPalette(style.dialog_palette())
         
         # Initialise the GUI
         self.__initUI()
@@ -79,14 +127,13 @@ class Setpoint(QDialog):
     def __initUI(self):
         
         # Arrange window
-        x,y,w,h = self.__model[STATE][WINDOWS][SETPOINT_WIN]
+        x,y,w,h = self.__geom
         self.setGeometry(x,y,w,h)
+        # Window moves and resizes are written to the model when they stop
+        self.__geom_saver = style.GeometrySaver(self, self.__geom)
                          
         self.setWindowTitle('Flexi-Loop Setpoint Management')
         
-        # Start idle processing
-        QtCore.QTimer.singleShot(IDLE_TICKER, self.__idleProcessing)
-        
     #=======================================================
     # Create all widgets
     def __populate(self):
@@ -105,10 +152,11 @@ class Setpoint(QDialog):
         grid.addWidget(heading,0, 0, 1, 3)
         
         # Table area
-        self.__table = QTableWidget()
+        self.__sp_model = SetpointTableModel(self.__model)
+        self.__table = QTableView()
+        self.__table.setModel(self.__sp_model)
         self.__table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self.__table.setColumnCount(4)
-        self.__table.setHorizontalHeaderLabels(('Name','Position %','Freq','SWR'))
+        self.__table.selectionModel().currentChanged.connect(self.__refresh_button_state)
         grid.addWidget(self.__table, 1, 0, 1, 3)
         
         # Button area
@@ -140,22 +188,29 @@ class Setpoint(QDialog):
         self.__nametxt = QLineEdit()
         self.__nametxt.setToolTip('Name the setpoint')
         self.__nametxt.setMaximumWidth(80)
+        self.__nametxt.textChanged.connect(self.__refresh_button_state)
         hbox.addWidget(self.__nametxt)
 
         freqlabel = QLabel('Freq')
         hbox.addWidget(freqlabel)
-        self.__freqtxt = QLineEdit()
+        # Frequency is MHz to 4 places, zero until one is entered
+        self.__freqtxt = QDoubleSpinBox()
         self.__freqtxt.setToolTip('Record frequency')
-        self.__freqtxt.setInputMask('09.9000')
+        self.__freqtxt.setDecimals(4)
+        self.__freqtxt.setRange(0.0, 99.9999)
         self.__freqtxt.setMaximumWidth(80)
+        self.__freqtxt.valueChanged.connect(self.__refresh_button_state)
         hbox.addWidget(self.__freqtxt)
         
         swrlabel = QLabel('SWR')
         hbox.addWidget(swrlabel)
-        self.__swrtxt = QLineEdit()
+        # SWR to 1 place
+        self.__swrtxt = QDoubleSpinBox()
         self.__swrtxt.setToolTip('Record SWR')
-        self.__swrtxt.setInputMask('D.9')
+        self.__swrtxt.setDecimals(1)
+        self.__swrtxt.setRange(1.0, 9.9)
         self.__swrtxt.setMaximumWidth(80)
+        self.__swrtxt.valueChanged.connect(self.__refresh_button_state)
         hbox.addWidget(self.__swrtxt)
         
         self.__add = QPushButton("Add")
@@ -171,127 +226,92 @@ class Setpoint(QDialog):
     #
     def set_loop(self, loop):
         self.__loop = loop
+        self.__loop_key = self.__get_loop_item()
         self.__looplabel.setText('Setpoints for loop [%d]' % self.__loop)
         self.__populate_table()
     
     #=======================================================
     # Window events
+    def showEvent(self, event):
+        self.__refresh_button_state()
+        
     def closeEvent(self, event):
+        self.__geom_saver.flush()
         self.close()
-
-    def resizeEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][SETPOINT_WIN]
-        self.__model[STATE][WINDOWS][SETPOINT_WIN] = [x,y,event.size().width(),event.size().height()]
-        
-    def moveEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][SETPOINT_WIN]
-        self.__model[STATE][WINDOWS][SETPOINT_WIN] = [event.pos().x(),event.pos().y(),w,h]
-        
+    
     #=======================================================
     # User events
     def __do_close(self):
         self.close()
     
     def __do_moveto(self):
-        r = self.__table.currentRow()
+        r = self.__table.currentIndex().row()
         if r != -1:
-            pos = float(self.__table.item(r, 1).text())
-            #Ask UI to move to pos
-            self.__cb(self.__pos_lookup[pos])
+            #Ask UI to move to the absolute position held with the name
+            self.__cb(self.__sp_model.abs_pos(r))
             
     def __do_remove(self):
-        r = self.__table.currentRow()
+        r = self.__table.currentIndex().row()
         if r != -1:
-            name = self.__table.item(r, 0).text()
-            sps = self.__model[CONFIG][SETPOINTS][self.__get_loop_item()]
-            del sps[name]
-            self.__table.removeRow(r);
-            self.__populate_table()
+            sps = self.__setpoints[self.__loop_key]
+            del sps[self.__sp_model.name(r)]
+            # The remaining rows are still valid so just drop this one
+            self.__sp_model.remove_row(r)
     
     def __do_add(self):
         # Get data
         name = self.__nametxt.text()
-        freq = self.__freqtxt.text()
-        swr = self.__swrtxt.text()
-        pos = self.__model[STATE][ARDUINO][MOTOR_POS]
-        fb = self.__model[STATE][ARDUINO][MOTOR_FB]
+        freq = self.__freqtxt.value()
+        swr = self.__swrtxt.value()
+        pos = self.__ard_state[MOTOR_POS]
+        fb = self.__ard_state[MOTOR_FB]
         if pos != -1:
-            # Create new row
-            rowPosition = self.__table.rowCount()
-            self.__table.insertRow(rowPosition)
-            self.__table.setItem(rowPosition, 0, QTableWidgetItem(name))
-            self.__table.setItem(rowPosition, 1, QTableWidgetItem(str(pos)))
-            self.__table.setItem(rowPosition, 2, QTableWidgetItem(freq))
-            self.__table.setItem(rowPosition, 3, QTableWidgetItem(swr))
             # Manage model
-            self.__pos_lookup[pos] = fb
-            self.__update_model()
-            self.__nametxt.setText('')
-            self.__freqtxt.setText('')
-            self.__swrtxt.setText('')
+            sps = self.__setpoints[self.__loop_key]
+            sps[name] = [int(fb), freq, swr]
+            # Update the row for the name or add a new one
+            self.__sp_model.set_point(name, *sps[name])
+            # Clear the entry fields and update the buttons once
+            with QtCore.QSignalBlocker(self.__nametxt), \
+                 QtCore.QSignalBlocker(self.__freqtxt), \
+                 QtCore.QSignalBlocker(self.__swrtxt):
+                self.__nametxt.setText('')
+                self.__freqtxt.setValue(0.0)
+                self.__swrtxt.setValue(1.0)
+            self.__refresh_button_state()
         else:
             self.logger.warn("No loop position available for add()")
     
     #=======================================================
     # Helpers
     def __populate_table(self):
-        key = self.__get_loop_item()
-        sps = self.__model[CONFIG][SETPOINTS][key]
-        row = 0
-        while self.__table.rowCount() > 0:
-            self.__table.removeRow(0);
-        for item in sps.items():
-            self.__table.insertRow(row)
-            self.__table.setItem(row, 0, QTableWidgetItem(item[0]))
-            self.__table.setItem(row, 1, QTableWidgetItem(str(analog_pos_to_percent(self.__model, item[1][0]))))
-            self.__table.setItem(row, 2, QTableWidgetItem(str(item[1][1])))
-            self.__table.setItem(row, 3, QTableWidgetItem(str(item[1][2])))
-            self.__pos_lookup[analog_pos_to_percent(self.__model, item[1][0])] = item[1][0]
-            row += 1
-        if self.__table.rowCount() > 0:
-            self.__table.selectRow(0)
-        
-    def __update_model(self):
-        item = self.__get_loop_item()    
-        self.__model[CONFIG][SETPOINTS][item].clear()    
-        for r in range(0, self.__table.rowCount()):
-            name = self.__table.item(r, 0).text()
-            pos = self.__pos_lookup[float(self.__table.item(r, 1).text())]
-            freq = self.__table.item(r, 2).text()
-            swr = self.__table.item(r, 3).text() 
-            self.__model[CONFIG][SETPOINTS][item][name] = [int(pos), float(freq), float(swr)]
-            
+        # The view is only reset when the rows differ from those shown
+        if self.__sp_model.set_points(self.__setpoints[self.__loop_key]):
+            if self.__sp_model.rowCount() > 0:
+                self.__table.selectRow(0)
+            self.__refresh_button_state()
+    
     def __get_loop_item(self):
-        if self.__loop == 1:
-           item = SP_L1
-        elif self.__loop == 2:
-           item = SP_L2
-        elif self.__loop == 3:
-           item = SP_L3
-        else:
-            # Should not happen
-            self.logger.warn("Invalid loop id {}".format(self.__loop))
-            item = SP_L1
-        return item
+        if 1 <= self.__loop <= 3:
+            return (SP_L1, SP_L2, SP_L3)[self.__loop-1]
+        # Should not happen
+        self.logger.warn("Invalid loop id {}".format(self.__loop))
+        return SP_L1
     
     #=======================================================
-    # Idle time
-    def __idleProcessing(self):
-        QtCore.QTimer.singleShot(IDLE_TICKER, self.__idleProcessing)
-        
-        if len(self.__nametxt.text()) > 0 and len(self.__freqtxt.text()) and len(self.__swrtxt.text()) > 0:
+    # Button state
+    # Called when the entry fields or the current row change
+    def __refresh_button_state(self):
+        if len(self.__nametxt.text()) > 0 and self.__freqtxt.value() > 0.0:
             self.__add.setEnabled(True)
         else:
             self.__add.setEnabled(False)
             
-        r = self.__table.currentRow()
+        r = self.__table.currentIndex().row()
         if r == -1:
             # No row selected
             self.__moveto.setEnabled(False)
             self.__remove.setEnabled(False)
         else:
             self.__moveto.setEnabled(True)
-            self.__remove.setEnabled(True) 
-        
\ No newline at end of file
+            self.__remove.setEnabled(True)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+# style.py
+#
+# Shared look and feel for the Flexi-loop windows
+# 
+# Copyright (C) 2024 by G3UKB Bob Cowdery
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#    
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#    
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#    
+#  The author can be reached by email at:   
+#     bob@bobcowdery.plus.com
+#
+
+
+# PyQt5 imports
+from qt_inc import *
+
+# Application imports
+from defs import *
+
+# Palette is the same for every dialog
+# It is created on first use as it needs the application
+_palette = None
+
+# Dialog back colour
+def dialog_palette():
+    global _palette
+    if _palette is None:
+        _palette = QPalette()
+        _palette.setColor(QPalette.Background, QColor(149,142,132))
+    return _palette
+
+# Writes a window's geometry into its model list once moves and resizes stop
+# The list is updated in place so the model keeps the same object
+class GeometrySaver(QtCore.QObject):
+    
+    def __init__(self, widget, geom):
+        super(GeometrySaver, self).__init__(widget)
+        
+        self.__geom = geom
+        self.__pending = list(geom)
+        self.__timer = QtCore.QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(GEOM_TICKER)
+        self.__timer.timeout.connect(self.flush)
+        widget.installEventFilter(self)
+    
+    # Write any pending geometry now
+    def flush(self):
+        self.__timer.stop()
+        self.__geom[:] = self.__pending
+    
+    # Watch the window, the event always carries on to it
+    def eventFilter(self, obj, event):
+        t = event.type()
+        if t == QtCore.QEvent.Resize:
+            self.__pending[2] = event.size().width()
+            self.__pending[3] = event.size().height()
+            self.__timer.start()
+        elif t == QtCore.QEvent.Move:
+            self.__pending[0] = event.pos().x()
+            self.__pending[1] = event.pos().y()
+            self.__timer.start()
+        return False
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#
+# tablemodel.py
+#
+# Shared table model for the Flexi-loop point views
+# 
+# Copyright (C) 2024 by G3UKB Bob Cowdery
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#    
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#    
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#    
+#  The author can be reached by email at:   
+#     bob@bobcowdery.plus.com
+#
+
+# PyQt5 imports
+from qt_inc import *
+
+# Read only table over a list of display rows
+# Each row is (absolute position, cell text) and subclasses build the rows
+class PointTableModel(QtCore.QAbstractTableModel):
+    
+    def __init__(self, headers):
+        super(PointTableModel, self).__init__()
+        
+        # Rows in display order as (absolute position, cell text)
+        self._rows = []
+        self._headers = headers
+    
+    #=======================================================
+    # PUBLIC
+    #
+    # Absolute feedback position for a table row
+    def abs_pos(self, row):
+        return self._rows[row][0]
+        
+    #=======================================================
+    # Model interface
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+    
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+    
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or role != QtCore.Qt.DisplayRole:
+            return None
+        return self._rows[index.row()][1][index.column()]
+    
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self._headers[section]
+        return super(PointTableModel, self).headerData(section, orientation, role)
+    
+    #=======================================================
+    # PROTECTED
+    #
+    # Replace all rows, returns False if they match those shown
+    # Rows hold the text as displayed so home, max and any edit to the points are all seen here
+    def _reset_rows(self, rows):
+        if rows == self._rows:
+            return False
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+        return True
@@ -54,6 +54,11 @@ class Track(threading.Thread):
         # Instance vars
         self.one_pass = False
         self.term = False
+        # Last lookup from the calibration map and last result sent
+        # The map itself is held so a replacement map can never share its id
+        self.__last_map = None
+        self.__last_lookup = None
+        self.__last_resp = None
     
     # Perform one tuning pass for given loop and frequency
     def do_one_pass(self, loop, pos):
@@ -86,39 +91,46 @@ class Track(threading.Thread):
                         r, f, swr = self.__vna_api.get_vswr(start, end, POINTS)
                     else:
                         r = False
+                    self.__last_lookup = None
                 else:
                     # We can only get a good approximation if we are within a frequency set
                     cal_t = (CAL_L1, CAL_L2, CAL_L3)
                     cal_map = self.__model[CONFIG][CAL][cal_t[self.__loop-1]]
+                    # Same position in the same map gives the same answer
+                    lookup = (self.__loop, self.__pos, len(cal_map))
+                    if cal_map is self.__last_map and lookup == self.__last_lookup:
+                        continue
                     r, f, swr = self.__find_from_position(cal_map, self.__pos)
+                    self.__last_map = cal_map
+                    self.__last_lookup = lookup
             except Exception as e:
                 self.logger.info("Exception in tracking [{}]".format(e))
                 r = False
                 
-            # Return response
+            # Return response only if it has changed
             if r:
-                self.__cb (((str(round(f, 4))), str(swr)))
+                resp = ((str(round(f, 4))), str(swr))
             else:
-                self.__cb (('?.?', '?.?'))
+                resp = ('?.?', '?.?')
+            if resp != self.__last_resp:
+                self.__last_resp = resp
+                self.__cb (resp)
                 
         print("Track thread  exiting...")
     
     # Find the frequency abd SWR from a position
     def __find_from_position(self, cal_map, pos):
         # Find the two points this pos falls between
-        index = 0
+        # Points are in ascending feedback order so stop at the first one above pos
         idx_low = -1
-        idx_high = -1
-        for pt in cal_map:
-            if pt[0] <= pos:
-                # Lower than target
-                idx_high = index+1 
-                idx_low = index
-            elif pt[0] <= pos:
+        for index, pt in enumerate(cal_map):
+            if pt[0] > pos:
                 break
-            index+=1
-        if idx_high == -1 or idx_low == -1:
-            return False, None
+            # Lower than target
+            idx_low = index
+        idx_high = idx_low + 1
+        if idx_low == -1 or idx_high >= len(cal_map):
+            return False, None, None
     
         # Calculate where between these points the frequency should be
         # Note high is the setting for higher frequency not higher feedback value
@@ -35,6 +35,7 @@ from qt_inc import *
 # Application imports
 from defs import *
 from utils import *
+import style
 import api
 import config
 import setpoints
@@ -87,8 +88,8 @@ class UI(QMainWindow):
         self.__fb_limits = fb_limits.FBLimits(self.__model, self.__s_q, self.__api.get_comms(), self.callback, self.msg_callback)
         self.__fb_limits.start()
         
-        # Create the config dialog
-        self.__config_dialog = config.Config(self.__model, self.msg_callback)
+        # The config dialog is created the first time it is used and then kept
+        self.__config_dialog = None
         
         # Create the setpoint dialog
         self.__sp_dialog = setpoints.Setpoint(self.__model, self.msg_callback, self.__move_callback)
@@ -100,19 +101,17 @@ class UI(QMainWindow):
         self.__selected_loop = 1
         self.__loop_status = [False, False, False]
         self.__last_widget_status = None
+        self.__last_manual_status = None
     
         # Set the back colour
         palette = QPalette()
         palette.setColor(QPalette.Background,QColor(158,152,143))
         self.setPalette(palette)
 
-        # Set the tooltip style
+        # Set the tooltip font
+        # This is global so also covers the dialogs
+        # Tooltip style is in the application stylesheet
         QToolTip.setFont(QFont('SansSerif', 10))
-        self.setStyleSheet('''QToolTip { 
-                           background-color: darkgray; 
-                           color: black; 
-                           border: #8ad4ff solid 1px
-                           }''')   
         
         # Local state holders
         self.__selected_loop = 1
@@ -120,7 +119,7 @@ class UI(QMainWindow):
         self.__current_activity = NONE
         self.__long_running = False
         self.__free_running = False
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__switch_mode = RADIO
         self.__last_switch_mode= self.__switch_mode
         self.__saved_mode = self.__switch_mode
@@ -151,6 +150,7 @@ class UI(QMainWindow):
         
         # Default to radio side
         self.__relay_state = RADIO
+        self.__shown_relay_state = None
         
         # Manual calibration status
         self.__man_hint = MAN_NONE
@@ -199,7 +199,7 @@ class UI(QMainWindow):
     def __move_callback(self, pos):
         # pos is expected to be the feedback value
         self.__current_activity = MOVETO
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][MOVE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(MOVE_TIMEOUT)
         self.__long_running = True
         self.__api.move_to_position(pos)
         
@@ -247,14 +247,14 @@ class UI(QMainWindow):
         # interpreted by the idle time function to manage the UI state.
         # Are we waiting for an activity to complete
         if self.__current_activity == NONE:
-            self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+            self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         else:
             # Activity in progress
             self.__activity_timer -= 1
             if self.__activity_timer <= 0:
                 self.logger.info ('Timed out waiting for activity {} to complete. Maybe the Arduino has gone off-line!'.format(self.__current_activity))
                 self.__current_activity = NONE
-                self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+                self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
                 return
             
             # Get current event data
@@ -325,8 +325,11 @@ class UI(QMainWindow):
     def __initUI(self):
         
         # Arrange window
-        x,y,w,h = self.__model[STATE][WINDOWS][MAIN_WIN]
+        geom = self.__model[STATE][WINDOWS][MAIN_WIN]
+        x,y,w,h = geom
         self.setGeometry(x,y,w,h)
+        # Window moves and resizes are written to the model when they stop
+        self.__geom_saver = style.GeometrySaver(self, geom)
                          
         self.setWindowTitle('Flexi-Loop Controller')
         
@@ -635,8 +638,7 @@ class UI(QMainWindow):
         manualgrid = QGridLayout()
         self.__manualcal.setLayout(manualgrid)
         
-        gap = QWidget()
-        manualgrid.addWidget(gap, 0, 0)
+        manualgrid.setColumnStretch(0, 1)
         
         # Dynamic data entry area for manual calibration
         freqlabel = QLabel('Freq')
@@ -655,8 +657,7 @@ class UI(QMainWindow):
         self.__manswrtxt.setMaximumWidth(80)
         manualgrid.addWidget(self.__manswrtxt, 0, 4)
         
-        gap = QWidget()
-        manualgrid.addWidget(gap, 0, 5)
+        manualgrid.setColumnStretch(5, 1)
         
         # Dynamic data entry buttons for manual calibration
         self.__save = QPushButton("Save")
@@ -739,8 +740,6 @@ class UI(QMainWindow):
         self.__subgrid.addWidget(self.__relay_sel, 0, 1)
         self.__relay_sel.currentIndexChanged.connect(self.__relay_change)
         
-        gap = QWidget()
-        self.__subgrid.addWidget(gap, 0, 2)
         self.__subgrid.setColumnStretch(2, 1)
         
         self.__runrev = QPushButton("<< Run Rev")
@@ -758,8 +757,6 @@ class UI(QMainWindow):
         self.__subgrid.addWidget(self.__runfwd, 0,5)
         self.__runfwd.clicked.connect(self.__do_run_fwd)
         
-        gap = QWidget()
-        self.__subgrid.addWidget(gap, 0, 6)
         self.__subgrid.setColumnStretch(6, 1)
         
          # Speed
@@ -838,26 +835,24 @@ class UI(QMainWindow):
         self.__close()
     
     def __close(self):
+        self.__geom_saver.flush()
         self.__track.terminate()
         self.__track.join()
         self.__fb_limits.terminate()
         self.__fb_limits.join()
         self.__api.terminate()
-
-    def resizeEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][MAIN_WIN]
-        self.__model[STATE][WINDOWS][MAIN_WIN] = [x,y,event.size().width(),event.size().height()]
-        
-    def moveEvent(self, event):
-        # Update config
-        x,y,w,h = self.__model[STATE][WINDOWS][MAIN_WIN]
-        self.__model[STATE][WINDOWS][MAIN_WIN] = [event.pos().x(),event.pos().y(),w,h]
     
     #=======================================================
     # Menu events
     def __do_config(self):
+        if self.__config_dialog is None:
+            self.__config_dialog = config.Config(self.__model, self.msg_callback)
+        elif not self.__config_dialog.isVisible():
+            # Discard any unsaved edits from the last time it was open
+            self.__config_dialog.reload()
         self.__config_dialog.show()
+        self.__config_dialog.raise_()
+        self.__config_dialog.activateWindow()
     
     #=======================================================
     # Main buttons events
@@ -874,7 +869,7 @@ class UI(QMainWindow):
     def __do_pot(self):
         # Do the configure sequence
         self.__current_activity = CONFIGURE
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][CALIBRATE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(CALIBRATE_TIMEOUT)
         self.__long_running = True
         # Dispatches on separate thread
         self.__api.configure()
@@ -935,7 +930,7 @@ class UI(QMainWindow):
     def __do_cal_deferred(self):
         # Do the calibrate sequence
         self.__current_activity = CALIBRATE
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][CALIBRATE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(CALIBRATE_TIMEOUT)
         self.__long_running = True
         self.__api.calibrate(self.__selected_loop, self.man_cal_callback)
     
@@ -993,7 +988,7 @@ class UI(QMainWindow):
             
     def __do_span_deferred(self):
         self.__current_activity = FREQLIMITS
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][CALIBRATE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(CALIBRATE_TIMEOUT)
         self.__long_running = True
         self.__api.set_limits(self.__selected_loop, self.man_cal_callback)
     
@@ -1005,8 +1000,8 @@ class UI(QMainWindow):
         self.__man_cal_state = MANUAL_DATA_AVAILABLE
     
     def __do_man_next(self):
-        self.__manfreqtxt.setText('')
-        self.__manswrtxt.setText('')
+        self.__manfreqtxt.clear()
+        self.__manswrtxt.clear()
         self.__man_cal_state = MANUAL_NEXT
         
     #=======================================================
@@ -1020,7 +1015,7 @@ class UI(QMainWindow):
     def __do_tune(self):
         self.__current_activity = TUNE
         self.__st_act.setText(TUNE)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][TUNE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(TUNE_TIMEOUT)
         self.__long_running = True
         self.__api.move_to_freq(self.__selected_loop, self.__tune_freq)
     
@@ -1037,21 +1032,21 @@ class UI(QMainWindow):
         self.__current_speed = self.__speed_sld.value()
         self.__current_activity = SPEED
         self.__st_act.setText(SPEED)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__api.speed_change(self.__current_speed)
         self.__model[STATE][ARDUINO][SPEED] = self.__current_speed
         
     def __do_run_fwd(self):
         self.__current_activity = RUNFWD
         self.__st_act.setText(RUNFWD)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][MOVE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(MOVE_TIMEOUT)
         self.__free_running = True
         self.__api.free_fwd()
     
     def __do_run_rev(self):
         self.__current_activity = RUNREV
         self.__st_act.setText(RUNREV)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][MOVE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(MOVE_TIMEOUT)
         self.__free_running = True
         self.__api.free_rev()
     
@@ -1061,39 +1056,39 @@ class UI(QMainWindow):
     def __do_pos(self):
         self.__current_activity = MOVETO
         self.__st_act.setText(MOVETO)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][MOVE_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(MOVE_TIMEOUT)
         self.__long_running = True
         self.__api.move_to_position(self.__movetxt.value(), MOVE_PERCENT)
     
     def __do_move_fwd(self):
         self.__current_activity = MSFWD
         self.__st_act.setText(MSFWD)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__api.move_fwd_for_ms(self.__inctxt.value())
     
     def __do_move_rev(self):
         self.__current_activity = MSREV
         self.__st_act.setText(MSREV)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__api.move_rev_for_ms(self.__inctxt.value())
     
     def __do_nudge_fwd(self):
         self.__current_activity = NUDGEFWD
         self.__st_act.setText(NUDGEFWD)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__api.nudge_fwd()
     
     def __do_nudge_rev(self):
         self.__current_activity = NUDGEREV
         self.__st_act.setText(NUDGEREV)
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__api.nudge_rev()
     
     #=======================================================
     # Helpers
     def __set_radio_mode(self):
         self.__current_activity = RLYOFF
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__api.radio_mode()
         self.__tg_ard.setText(RADIO)
         self.__relay_sel.setCurrentText(RADIO)
@@ -1101,12 +1096,16 @@ class UI(QMainWindow):
             
     def __set_analyser_mode(self):
         self.__current_activity = RLYON
-        self.__activity_timer = self.__model[CONFIG][TIMEOUTS][SHORT_TIMEOUT]*(1000/IDLE_TICKER)
+        self.__activity_timer = self.__timeout_passes(SHORT_TIMEOUT)
         self.__api.analyser_mode()
         self.__tg_ard.setText(ANALYSER)
         self.__relay_sel.setCurrentText(ANALYSER)
         self.__relay_state = ANALYSER
      
+    # Number of idle passes for a configured timeout
+    def __timeout_passes(self, timeout):
+        return self.__model[CONFIG][TIMEOUTS][timeout] * IDLE_PASSES_PER_SEC
+    
     def __is_float(self, value):
         if value is None:
             return False
@@ -1142,7 +1141,7 @@ class UI(QMainWindow):
                     if self.__fb_limits.has_change():
                         self.__current_activity = FBLIMITS
                         self.__st_act.setText(FBLIMITS)
-                        self.__fb_limits.do_one_pass()
+                        self.__fb_limits.do_one_pass(self.__model[CONFIG][CAL][HOME], self.__model[CONFIG][CAL][MAX])
                 else:
                     self.__update_ctr -= 1
                     
@@ -1180,13 +1179,11 @@ class UI(QMainWindow):
                         self.__set_analyser_mode()
                     else:
                         self.__set_radio_mode()
-                # Set target indicators
-                if self.__relay_state == RADIO:
-                    self.__tg_ard.setText(RADIO)
-                    self.__relay_sel.setCurrentText(RADIO)
-                elif self.__relay_state == ANALYSER:
-                    self.__tg_ard.setText(ANALYSER)
-                    self.__relay_sel.setCurrentText(ANALYSER)
+                # Set target indicators when the relay state changes
+                if self.__relay_state != self.__shown_relay_state:
+                    self.__shown_relay_state = self.__relay_state
+                    self.__tg_ard.setText(self.__relay_state)
+                    self.__relay_sel.setCurrentText(self.__relay_state)
                     
                 # Clear running indicators
                 self.__long_running = False
@@ -1266,22 +1263,28 @@ class UI(QMainWindow):
         # =======================================================
         # Output any queued messages
         if self.__msgq.qsize() > 0:
-            while self.__msgq.qsize() > 0:
-                msg, msgtype = self.__msgq.get()
-                self.__msglist.insertItem(0, msg)
-                if msgtype == MSG_INFO:
-                    self.__msglist.item(0).setForeground(QColor(60,60,60))
-                elif msgtype == MSG_STATUS:
-                    self.__msglist.item(0).setForeground(QColor(33,82,3))
-                elif msgtype == MSG_ALERT:
-                    self.__msglist.item(0).setForeground(QColor(191,13,13))
-                else:
-                    self.__msglist.item(0).setForeground(QColor(60,60,60))
-            # Cull messages?
-            if self.__msglist.count() > 100:
-                # Keep history between 50 and 100
-                for n in range(0, 50):
-                    self.__msglist.takeItem(n)
+            # Add and cull the whole batch with a single repaint
+            self.__msglist.setUpdatesEnabled(False)
+            try:
+                while self.__msgq.qsize() > 0:
+                    msg, msgtype = self.__msgq.get()
+                    self.__msglist.insertItem(0, msg)
+                    if msgtype == MSG_INFO:
+                        self.__msglist.item(0).setForeground(QColor(60,60,60))
+                    elif msgtype == MSG_STATUS:
+                        self.__msglist.item(0).setForeground(QColor(33,82,3))
+                    elif msgtype == MSG_ALERT:
+                        self.__msglist.item(0).setForeground(QColor(191,13,13))
+                    else:
+                        self.__msglist.item(0).setForeground(QColor(60,60,60))
+                # Cull messages?
+                if self.__msglist.count() > 100:
+                    # Keep history between 50 and 100
+                    # Newest are inserted at the top so drop from the bottom
+                    while self.__msglist.count() > 50:
+                        self.__msglist.takeItem(self.__msglist.count() - 1)
+            finally:
+                self.__msglist.setUpdatesEnabled(True)
         
         # =======================================================
         # Set general widget state
@@ -1480,6 +1483,12 @@ class UI(QMainWindow):
     
     # Manage manual data entry state   
     def __manage_manual_widgets(self):
+        # Only touch the widgets when the state or entry changes
+        has_data = len(self.__manfreqtxt.text()) > 0 and len(self.__manswrtxt.text()) > 0
+        status = (self.__man_cal_state, has_data)
+        if status == self.__last_manual_status: return
+        self.__last_manual_status = status
+        
         if self.__man_cal_state == MANUAL_IDLE:
             self.__manfreqtxt.setEnabled(False)
             self.__manswrtxt.setEnabled(False)
@@ -1488,7 +1497,7 @@ class UI(QMainWindow):
         elif self.__man_cal_state == MANUAL_DATA_REQD:
             self.__manfreqtxt.setEnabled(True)
             self.__manswrtxt.setEnabled(True)
-            if len(self.__manfreqtxt.text()) > 0 and len(self.__manswrtxt.text()) > 0: 
+            if has_data: 
                 self.__save.setEnabled(True)
             self.__next.setEnabled(False)
         elif self.__man_cal_state == MANUAL_DATA_AVAILABLE:
@@ -62,20 +62,26 @@ def percent_pos_to_analog(model, pos):
 
 # Return the absolute analog value given the % extension   
 def analog_pos_to_percent(model, pos):
+    return analog_to_percent_fn(model)(pos)
+
+# Return a function giving the % extension for an absolute analog value
+# Home and max are read once so use this when converting many positions
+def analog_to_percent_fn(model):
     # pos is given as the absolute analog value
     # convert this into the corresponding relative percentage
     # home and max are the analog feedback values 
     home = model[CONFIG][CAL][HOME]
     maximum = model[CONFIG][CAL][MAX]
     if home == -1 or maximum == -1:
-        return None
-    span = maximum - home
-    offset = pos - home
-    val = round_sig(((float(offset)/float(span))*100.0))
-    # Due to slight variation in the feedback value we can go slightly over limits.
-    if val < 0.0: val = 0.0
-    if val > 100.0: val = 100.0
-    return val
+        return lambda pos: None
+    span = float(maximum - home)
+    def convert(pos):
+        val = round_sig(((float(pos - home)/span)*100.0))
+        # Due to slight variation in the feedback value we can go slightly over limits.
+        if val < 0.0: val = 0.0
+        if val > 100.0: val = 100.0
+        return val
+    return convert
 
 # Round a floating pint number to n significant digits 
 def round_sig(x, sig=2):